@@ -0,0 +1,55 @@
+# api/cache.py
+
+"""
+Process-local caches for slow-changing MongoDB data.
+"""
+
+from time import monotonic
+from typing import Any, Hashable
+
+from pymongo.asynchronous.database import AsyncDatabase
+
+
+class TTLCache:
+    """Small in-memory cache whose entries expire after ttl seconds."""
+
+    def __init__(self, ttl: float, maxsize: int = 128):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._entries: dict[Hashable, tuple[float, Any]] = {}
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Return the cached value for key, or default if missing or expired."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return default
+        expires_at, value = entry
+        if expires_at < monotonic():
+            del self._entries[key]
+            return default
+        return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        """Cache value under key, evicting the oldest entry when full."""
+        if key not in self._entries and len(self._entries) >= self.maxsize:
+            del self._entries[next(iter(self._entries))]
+        self._entries[key] = (monotonic() + self.ttl, value)
+
+    def clear(self) -> None:
+        """Drop all entries."""
+        self._entries.clear()
+
+
+# Species requirements are seeded by the service and never written by the API
+REQUIREMENTS_TTL_SECONDS = 300
+_requirements_cache = TTLCache(ttl=REQUIREMENTS_TTL_SECONDS, maxsize=64)
+
+
+async def get_requirements(db: AsyncDatabase, species: str) -> dict | None:
+    """Get the habitat_requirements document for a species, cached per process."""
+    requirements = _requirements_cache.get(species)
+    if requirements is None:
+        requirements = await db.habitat_requirements.find_one({"species": species})
+        if requirements is not None:
+            _requirements_cache.set(species, requirements)
+    return requirements
@@ -5,7 +5,6 @@ Configuration for the Reptilia API.
 """
 
 from pydantic_settings import BaseSettings
-from functools import lru_cache
 
 
 class Settings(BaseSettings):
@@ -15,6 +14,19 @@ class Settings(BaseSettings):
     mongodb_uri: str = "mongodb://localhost:27017"
     mongodb_database: str = "reptilia"
 
+    # MongoDB connection pool / timeouts
+    mongo_max_pool_size: int = 50
+    mongo_min_pool_size: int = 5
+    mongo_max_idle_time_ms: int = 60000
+    mongo_server_selection_timeout_ms: int = 5000
+    mongo_connect_timeout_ms: int = 5000
+    mongo_socket_timeout_ms: int = 10000
+    mongo_compressors: str = "zstd,snappy,zlib"
+
+    # Read preference for history/list endpoints (see database.get_read_db);
+    # on a standalone server every mode reads from the primary
+    mongo_read_preference: str = "secondaryPreferred"
+
     # API
     api_title: str = "Reptilia API"
     api_version: str = "1.0.0"
@@ -28,7 +40,10 @@ class Settings(BaseSettings):
         env_file_encoding = "utf-8"
 
 
-@lru_cache()
+# Settings are loaded once at import time and shared by the whole app
+settings = Settings()
+
+
 def get_settings() -> Settings:
-    """Get cached settings instance."""
-    return Settings()
+    """Get the shared settings instance."""
+    return settings
@@ -5,52 +5,283 @@ MongoDB connection management for the Reptilia API.
 Supports both local MongoDB and MongoDB Atlas (mongodb+srv://).
 """
 
+import asyncio
+import os
 import re
-from pymongo import MongoClient
-from pymongo.database import Database
-from typing import Generator
+from datetime import timezone
+from functools import lru_cache
+from fastapi import HTTPException, Request
+from pymongo import ASCENDING, DESCENDING, AsyncMongoClient
+from pymongo.asynchronous.collection import AsyncCollection
+from pymongo.asynchronous.database import AsyncDatabase
+from pymongo.read_preferences import make_read_preference, read_pref_mode_from_name
+from typing import AsyncGenerator
 
-from api.config import get_settings
+from api.config import settings
+from api.rollups import ROLLUP_COLLECTION, ROLLUP_INDEX
 
-# Global client instance
-_client: MongoClient | None = None
+# Rollups expire with the raw readings they summarize (the service keeps 90 days)
+ROLLUP_TTL_SECONDS = 90 * 24 * 60 * 60
 
+# Matches the password portion of a connection string
+_PASSWORD_MASK_RE = re.compile(r'(://[^:]+:)[^@]+(@)')
 
+# Global client and database instances, owned by the process that created them
+_client: AsyncMongoClient | None = None
+_client_pid: int | None = None
+_db: AsyncDatabase | None = None
+_read_db: AsyncDatabase | None = None
+
+# Result of the most recent ping: the startup ping, then run_health_probe
+HEALTH_PROBE_SECONDS = 5
+_db_healthy = False
+
+# (collection, index name) pairs that ensure_indexes built in this process
+_built_indexes: set[tuple[str, str]] = set()
+
+
+@lru_cache(maxsize=4)
 def _mask_connection_string(uri: str) -> str:
     """Mask password in connection string for safe logging."""
-    return re.sub(r'(://[^:]+:)[^@]+(@)', r'\1****\2', uri)
+    return _PASSWORD_MASK_RE.sub(r'\1****\2', uri)
 
 
-def get_client() -> MongoClient:
-    """Get or create MongoDB client."""
-    global _client
+def get_client() -> AsyncMongoClient:
+    """Get or create MongoDB client (rebuilt if the process has forked)."""
+    global _client, _client_pid, _db, _read_db
+    if _client is not None and _client_pid != os.getpid():
+        # Inherited from a parent process (e.g. uvicorn --workers); its socket
+        # pool is not fork-safe, so drop it rather than reuse or close it
+        _client = None
+        _db = None
+        _read_db = None
     if _client is None:
-        settings = get_settings()
         masked_uri = _mask_connection_string(settings.mongodb_uri)
         print(f"Connecting to MongoDB at {masked_uri}...")
-        _client = MongoClient(settings.mongodb_uri)
+        _client = AsyncMongoClient(
+            settings.mongodb_uri,
+            maxPoolSize=settings.mongo_max_pool_size,
+            minPoolSize=settings.mongo_min_pool_size,
+            maxIdleTimeMS=settings.mongo_max_idle_time_ms,
+            serverSelectionTimeoutMS=settings.mongo_server_selection_timeout_ms,
+            connectTimeoutMS=settings.mongo_connect_timeout_ms,
+            socketTimeoutMS=settings.mongo_socket_timeout_ms,
+            compressors=settings.mongo_compressors,
+            retryWrites=True,
+            # BSON dates are UTC; decode them as aware datetimes so handlers
+            # can compare against datetime.now(timezone.utc) directly
+            tz_aware=True,
+            tzinfo=timezone.utc
+        )
+        _client_pid = os.getpid()
     return _client
 
 
-def get_database() -> Database:
+def _reset_after_fork():
+    """Forget the parent's client in a forked child process."""
+    global _client, _client_pid, _db, _read_db
+    _client = None
+    _client_pid = None
+    _db = None
+    _read_db = None
+
+
+os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def get_database() -> AsyncDatabase:
     """Get the reptilia database."""
-    settings = get_settings()
-    return get_client()[settings.mongodb_database]
+    global _db
+    if _db is None:
+        _db = get_client()[settings.mongodb_database]
+    return _db
+
+
+def get_read_database() -> AsyncDatabase:
+    """Get the reptilia database using the configured read preference for read-only queries."""
+    global _read_db
+    if _read_db is None:
+        _read_db = get_database().with_options(
+            read_preference=make_read_preference(
+                read_pref_mode_from_name(settings.mongo_read_preference), None
+            )
+        )
+    return _read_db
+
+
+async def _create_index(collection: AsyncCollection, keys, **kwargs):
+    """Create one index, logging instead of raising if it can't be built."""
+    try:
+        name = await collection.create_index(keys, **kwargs)
+    except Exception as e:
+        print(f"Warning: Could not create index {kwargs.get('name')} on {collection.name}: {e}")
+    else:
+        _built_indexes.add((collection.name, name))
+
+
+def has_index(collection: str, name: str) -> bool:
+    """Whether ensure_indexes built the named index on the collection."""
+    return (collection, name) in _built_indexes
+
+
+def index_hint(collection: str, name: str) -> dict:
+    """
+    Keyword arguments hinting the named index, or none if it wasn't built.
+
+    MongoDB fails a query hinting a missing index rather than planning it
+    without one, so handlers only hint indexes known to exist.
+    """
+    return {"hint": name} if has_index(collection, name) else {}
 
 
-def close_connection():
+async def ensure_indexes(db: AsyncDatabase):
+    """
+    Create the indexes backing the API's query patterns (idempotent).
+
+    Each index is attempted on its own, so one failure (e.g. duplicate keys
+    blocking a unique index) is logged without skipping the rest; see
+    has_index for which ones were built.
+    """
+    # Alerts: newest-first listing, filtered listing and unacknowledged counts
+    await _create_index(
+        db.alerts,
+        [("created_at", DESCENDING)],
+        name="created_at_idx"
+    )
+    await _create_index(
+        db.alerts,
+        [("acknowledged", ASCENDING), ("severity", ASCENDING), ("created_at", DESCENDING)],
+        name="ack_severity_created_idx"
+    )
+    await _create_index(
+        db.alerts,
+        [("sensor_id", ASCENDING), ("created_at", DESCENDING)],
+        name="sensor_created_idx"
+    )
+    await _create_index(db.alerts, "alert_id", unique=True, name="alert_id_idx")
+    # Only open alerts are indexed, so active-alert counts stay proportional
+    # to the open set rather than the whole alert history
+    await _create_index(
+        db.alerts,
+        "acknowledged",
+        partialFilterExpression={"acknowledged": False},
+        name="unacknowledged_idx"
+    )
+
+    # Habitat lookups and dashboard joins: latest reading per sensor, outlet
+    # state, species requirements.
+    # Names and options match the service's own indexes on these collections.
+    await _create_index(
+        db.sensor_readings,
+        [("sensor_id", ASCENDING), ("timestamp", DESCENDING)],
+        name="sensor_timestamp_idx"
+    )
+    await _create_index(db.habitats, "habitat_id", unique=True, name="habitat_id_idx")
+    await _create_index(db.outlet_states, "outlet_id", unique=True, name="outlet_id_idx")
+    await _create_index(db.habitat_requirements, "species", unique=True, name="species_idx")
+
+    # Outlet history, rule lookups and per-sensor thresholds
+    await _create_index(
+        db.outlet_commands,
+        [("outlet_id", ASCENDING), ("timestamp", DESCENDING)],
+        name="outlet_timestamp_idx"
+    )
+    await _create_index(db.automation_rules, "rule_id", unique=True, name="rule_id_idx")
+    await _create_index(db.automation_rules, "outlet_id", name="outlet_id_idx")
+    await _create_index(db.thresholds, "sensor_id", unique=True, name="sensor_id_idx")
+    await _create_index(db.thresholds, "habitat_id", name="habitat_id_idx")
+
+    # Per-minute rollups: the unique key doubles as the $merge target
+    await _create_index(
+        db[ROLLUP_COLLECTION],
+        [("sensor_id", ASCENDING), ("timestamp", ASCENDING)],
+        unique=True,
+        name=ROLLUP_INDEX
+    )
+    await _create_index(
+        db[ROLLUP_COLLECTION],
+        "timestamp",
+        expireAfterSeconds=ROLLUP_TTL_SECONDS,
+        name="ttl_idx"
+    )
+
+
+async def backfill_threshold_habitats(db: AsyncDatabase):
+    """
+    Stamp habitat_id onto thresholds written before it was stored (idempotent).
+
+    Maps each habitat's sensor ids to the habitat and merges them into the
+    matching thresholds server-side; sensors without a threshold are skipped.
+    """
+    cursor = await db.habitats.aggregate([
+        {"$project": {"_id": 0, "habitat_id": 1, "sensor_id": [
+            "$basking_temp_sensor_id", "$cool_temp_sensor_id", "$humidity_sensor_id"
+        ]}},
+        {"$unwind": "$sensor_id"},
+        {"$match": {"sensor_id": {"$type": "string", "$ne": ""}}},
+        {"$merge": {
+            "into": "thresholds",
+            "on": "sensor_id",
+            "whenMatched": "merge",
+            "whenNotMatched": "discard",
+        }},
+    ])
+    # $merge writes server-side; draining the (empty) cursor waits for it
+    await cursor.to_list(length=None)
+
+
+def is_db_healthy() -> bool:
+    """Whether the most recent ping (startup or background) succeeded."""
+    return _db_healthy
+
+
+def record_db_health(healthy: bool):
+    """Record the outcome of a ping."""
+    global _db_healthy
+    _db_healthy = healthy
+
+
+async def run_health_probe(db: AsyncDatabase):
+    """Ping MongoDB every HEALTH_PROBE_SECONDS and record the result until cancelled."""
+    while True:
+        try:
+            await db.command("ping")
+            record_db_health(True)
+        except Exception:
+            record_db_health(False)
+        await asyncio.sleep(HEALTH_PROBE_SECONDS)
+
+
+async def close_connection():
     """Close the MongoDB connection."""
-    global _client
+    global _client, _db, _read_db
     if _client is not None:
-        _client.close()
+        await _client.close()
         _client = None
+        _db = None
+        _read_db = None
 
 
 # Dependency for FastAPI
-def get_db() -> Generator[Database, None, None]:
+async def get_db(request: Request) -> AsyncGenerator[AsyncDatabase, None]:
     """FastAPI dependency that provides database access."""
+    # Fail fast while the startup connection check is still pending
+    if not getattr(request.app.state, "db_ready", True):
+        raise HTTPException(status_code=503, detail="Database not ready")
     db = get_database()
     try:
         yield db
     finally:
         pass  # Connection pooling handles cleanup
+
+
+async def get_read_db(request: Request) -> AsyncGenerator[AsyncDatabase, None]:
+    """
+    FastAPI dependency for read-only endpoints.
+
+    Reads may be served by a secondary, so use get_db wherever a request
+    must see its own (or a just-made) write.
+    """
+    if not getattr(request.app.state, "db_ready", True):
+        raise HTTPException(status_code=503, detail="Database not ready")
+    yield get_read_database()
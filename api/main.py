@@ -9,12 +9,22 @@ reading sensor data, controlling outlets, and more.
 Run with: uvicorn api.main:app --reload
 """
 
+import asyncio
 from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 
 from api.config import get_settings
-from api.database import get_database, close_connection
+from api.database import (
+    get_database,
+    close_connection,
+    ensure_indexes,
+    backfill_threshold_habitats,
+    record_db_health,
+    run_health_probe
+)
+from api.rollups import run_rollups
 from api.routers import (
     habitats_router,
     species_router,
@@ -28,22 +38,60 @@ from api.routers import (
     dashboard_router
 )
 
+# Delay between MongoDB connection attempts during startup
+DB_RETRY_SECONDS = 5
 
-@asynccontextmanager
-async def lifespan(app: FastAPI):
-    """Handle startup and shutdown events."""
-    # Startup: verify database connection
+
+async def _init_database(app: FastAPI):
+    """Wait for MongoDB to answer, ensure indexes, then mark the app ready."""
     db = get_database()
+    while True:
+        try:
+            await db.command("ping")
+            # The background probe only starts once init finishes; until
+            # then this ping is the latest word on database health
+            record_db_health(True)
+            break
+        except Exception as e:
+            print(f"Warning: Could not connect to MongoDB: {e}")
+            await asyncio.sleep(DB_RETRY_SECONDS)
+
+    print(f"Connected to MongoDB: {db.name}")
+
+    # Only accept requests once the indexes are in place; handlers hint just
+    # the ones that were built (ensure_indexes logs per-index failures)
+    try:
+        await ensure_indexes(db)
+    except Exception as e:
+        print(f"Warning: Could not prepare MongoDB indexes: {e}")
+    app.state.db_ready = True
+
     try:
-        db.command("ping")
-        print(f"Connected to MongoDB: {db.name}")
+        await backfill_threshold_habitats(db)
     except Exception as e:
-        print(f"Warning: Could not connect to MongoDB: {e}")
+        print(f"Warning: Could not backfill threshold habitats: {e}")
+
+
+async def _run_background_jobs(app: FastAPI):
+    """Initialize the database, then run the health probe and reading rollups."""
+    await _init_database(app)
+    db = get_database()
+    await asyncio.gather(run_health_probe(db), run_rollups(db))
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Handle startup and shutdown events."""
+    # Startup: connect and ensure indexes in the background so startup isn't
+    # blocked on slow DNS/Atlas handshakes
+    app.state.db_ready = False
+    background_task = asyncio.create_task(_run_background_jobs(app))
 
     yield
 
-    # Shutdown: close database connection
-    close_connection()
+    # Shutdown: stop background jobs and close database connection
+    background_task.cancel()
+    await close_connection()
     print("Closed MongoDB connection")
 
 
@@ -55,13 +103,14 @@ def create_app() -> FastAPI:
         title=settings.api_title,
         version=settings.api_version,
         description="REST API for the Reptile Habitat Automation System",
+        default_response_class=ORJSONResponse,
         lifespan=lifespan
     )
 
-    # Configure CORS for React Native
+    # Configure CORS for React Native (a frozenset makes origin checks O(1))
     app.add_middleware(
         CORSMiddleware,
-        allow_origins=settings.cors_origins,
+        allow_origins=frozenset(settings.cors_origins),
         allow_credentials=True,
         allow_methods=["*"],
         allow_headers=["*"],
@@ -93,7 +142,7 @@ def create_app() -> FastAPI:
     @app.get("/health")
     def health():
         """Simple health check endpoint."""
-        return {"status": "ok"}
+        return {"status": "ok", "db_ready": app.state.db_ready}
 
     return app
 
@@ -46,6 +46,8 @@ from api.models.schemas import (
     # Alerts
     AlertResponse,
     AlertAcknowledgeRequest,
+    AlertBulkAcknowledgeRequest,
+    AlertBulkAcknowledgeResponse,
     # System
     SystemStatusResponse
 )
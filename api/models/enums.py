@@ -5,6 +5,7 @@ Enums for the Reptilia API.
 """
 
 from enum import Enum
+from typing import TypeVar
 
 
 class ReptileSpecies(str, Enum):
@@ -69,3 +70,16 @@ class TriggerOperator(str, Enum):
     LTE = "lte"
     GTE = "gte"
     EQ = "eq"
+
+
+E = TypeVar("E", bound=Enum)
+
+
+def members_by_value(enum_cls: type[E]) -> dict[str, E]:
+    """
+    Map each stored value to its enum member.
+
+    Response builders decode enum values from every document they convert,
+    and a dict hit is much cheaper than calling the Enum class each time.
+    """
+    return {member.value: member for member in enum_cls}
@@ -337,6 +337,16 @@ class AlertAcknowledgeRequest(BaseModel):
     user: str
 
 
+class AlertBulkAcknowledgeRequest(BaseModel):
+    alert_ids: list[str]
+    user: str
+
+
+class AlertBulkAcknowledgeResponse(BaseModel):
+    requested: int
+    acknowledged: int
+
+
 # ============================================================
 # System Status Schemas
 # ============================================================
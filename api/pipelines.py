@@ -0,0 +1,26 @@
+# api/pipelines.py
+
+"""
+Aggregation stages shared by routers that join habitats to their readings.
+"""
+
+
+def latest_reading_lookup(sensor_field: str, as_field: str) -> dict:
+    """
+    $lookup stage joining the newest reading of the sensor named by sensor_field.
+
+    Uses a per-sensor $eq match so each lookup is a single probe of
+    sensor_timestamp_idx; an $in over several sensors inside $expr cannot use
+    the index.
+    """
+    return {"$lookup": {
+        "from": "sensor_readings",
+        "let": {"sensor_id": f"${sensor_field}"},
+        "pipeline": [
+            {"$match": {"$expr": {"$eq": ["$sensor_id", "$$sensor_id"]}}},
+            {"$sort": {"timestamp": -1}},
+            {"$limit": 1},
+            {"$project": {"_id": 0, "value": 1, "timestamp": 1}},
+        ],
+        "as": as_field,
+    }}
@@ -0,0 +1,125 @@
+# api/rollups.py
+
+"""
+Per-minute sensor reading rollups.
+
+Raw readings arrive several times a minute per sensor, so long history views
+are served from a downsampled collection that a background job keeps current.
+"""
+
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+from bson import ObjectId
+from pymongo import DESCENDING
+from pymongo.asynchronous.database import AsyncDatabase
+
+# Collection holding one document per sensor per minute
+ROLLUP_COLLECTION = "sensor_readings_1m"
+
+# Unique (sensor_id, timestamp) index that $merge matches buckets on
+ROLLUP_INDEX = "sensor_timestamp_idx"
+
+# How often the rollup job folds in new readings
+ROLLUP_INTERVAL_SECONDS = 60
+
+# Each run recomputes at least this far back, and any older bucket that
+# gained a reading in that time (back-dated POSTs, lagging sensors, late
+# buffer flushes)
+ROLLUP_LOOKBACK = timedelta(minutes=15)
+
+
+async def rollup_readings(db: AsyncDatabase):
+    """
+    Fold new raw readings into per-minute rollup documents.
+
+    Resumes from the newest stored bucket (or ROLLUP_LOOKBACK ago, whichever
+    is earlier) and does a full backfill when the rollup collection is
+    empty, so readings from before deploy or an outage are still covered.
+    Whole buckets are recomputed from the raw readings, so runs are
+    idempotent and safe to repeat from several workers. Late readings are
+    found by insertion time: a reading's ObjectId records when it was
+    written, so any reading inserted since the window start marks its
+    (possibly older) bucket for recomputation.
+    """
+    # Minute-aligned, so the window only ever holds whole buckets
+    cutoff = (datetime.now(timezone.utc) - ROLLUP_LOOKBACK).replace(second=0, microsecond=0)
+    newest = await db[ROLLUP_COLLECTION].find_one(
+        {}, {"_id": 0, "timestamp": 1}, sort=[("timestamp", DESCENDING)]
+    )
+
+    match = {"is_valid": {"$ne": False}}
+    if newest:
+        start = min(newest["timestamp"], cutoff)
+        cursor = await db.sensor_readings.aggregate([
+            {"$match": {
+                "_id": {"$gte": ObjectId.from_datetime(start)},
+                "timestamp": {"$lt": start},
+            }},
+            {"$group": {"_id": {
+                "sensor_id": "$sensor_id",
+                "timestamp": {"$dateTrunc": {"date": "$timestamp", "unit": "minute"}},
+            }}},
+        ])
+        late_buckets = [
+            {
+                "sensor_id": b["_id"]["sensor_id"],
+                "timestamp": {
+                    "$gte": b["_id"]["timestamp"],
+                    "$lt": b["_id"]["timestamp"] + timedelta(minutes=1),
+                },
+            }
+            async for b in cursor
+        ]
+        match["$or"] = [{"timestamp": {"$gte": start}}, *late_buckets]
+
+    cursor = await db.sensor_readings.aggregate([
+        {"$match": match},
+        {"$group": {
+            "_id": {
+                "sensor_id": "$sensor_id",
+                "timestamp": {"$dateTrunc": {"date": "$timestamp", "unit": "minute"}},
+            },
+            "value": {"$avg": "$value"},
+            "min": {"$min": "$value"},
+            "max": {"$max": "$value"},
+            "count": {"$sum": 1},
+            "unit": {"$first": "$unit"},
+        }},
+        {"$project": {
+            "_id": 0,
+            "sensor_id": "$_id.sensor_id",
+            "timestamp": "$_id.timestamp",
+            "value": 1,
+            "min": 1,
+            "max": 1,
+            "count": 1,
+            "unit": 1,
+        }},
+        {"$merge": {
+            "into": ROLLUP_COLLECTION,
+            "on": ["sensor_id", "timestamp"],
+            "whenMatched": "replace",
+            "whenNotMatched": "insert",
+        }},
+    ])
+    # $merge writes server-side; draining the (empty) cursor waits for it
+    await cursor.to_list(length=None)
+
+
+async def run_rollups(db: AsyncDatabase):
+    """Keep the rollup collection current until cancelled."""
+    # Every $merge fails without its unique index, so stop rather than
+    # retrying a run that can't succeed
+    if ROLLUP_INDEX not in await db[ROLLUP_COLLECTION].index_information():
+        print(
+            f"Error: {ROLLUP_COLLECTION} is missing its unique {ROLLUP_INDEX} "
+            f"index; sensor reading rollups are disabled"
+        )
+        return
+    while True:
+        try:
+            await rollup_readings(db)
+        except Exception as e:
+            print(f"Warning: Could not roll up sensor readings: {e}")
+        await asyncio.sleep(ROLLUP_INTERVAL_SECONDS)
@@ -1,15 +1,11 @@
 # api/routers/__init__.py
 
-from api.routers.habitats import router as habitats_router
-from api.routers.species import router as species_router
-from api.routers.sensors import router as sensors_router
-from api.routers.outlets import router as outlets_router
-from api.routers.thresholds import router as thresholds_router
-from api.routers.rules import router as rules_router
-from api.routers.daynight import router as daynight_router
-from api.routers.alerts import router as alerts_router
-from api.routers.status import router as status_router
-from api.routers.dashboard import router as dashboard_router
+"""
+API routers. Each `<name>_router` is imported lazily on first access so
+importing the package doesn't pull in every router module up front.
+"""
+
+import importlib
 
 __all__ = [
     "habitats_router",
@@ -23,3 +19,12 @@ __all__ = [
     "status_router",
     "dashboard_router"
 ]
+
+
+def __getattr__(name: str):
+    """Import `api.routers.<module>` and return its router for `<module>_router`."""
+    if name in __all__:
+        module = importlib.import_module(f"api.routers.{name.removesuffix('_router')}")
+        globals()[name] = module.router
+        return module.router
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
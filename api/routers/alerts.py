@@ -4,27 +4,65 @@
 Alert endpoints for the Reptilia API.
 """
 
+import asyncio
 from datetime import datetime, timezone
-from typing import Optional
-from fastapi import APIRouter, Depends, HTTPException, Query
-from pymongo.database import Database
-
-from api.database import get_db
-from api.models.schemas import AlertResponse, AlertAcknowledgeRequest
-from api.models.enums import AlertSeverity
+from time import time as _time
+from typing import AsyncGenerator, Optional
+import orjson
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response
+from fastapi.responses import StreamingResponse
+from pymongo.asynchronous.database import AsyncDatabase
+from pymongo import ReturnDocument
+
+from api.database import get_db, get_read_db, index_hint
+from api.models.schemas import (
+    AlertResponse,
+    AlertAcknowledgeRequest,
+    AlertBulkAcknowledgeRequest,
+    AlertBulkAcknowledgeResponse
+)
+from api.models.enums import AlertSeverity, members_by_value
 
 router = APIRouter(prefix="/alerts", tags=["Alerts"])
 
+_UTC = timezone.utc
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+NDJSON_BATCH_SIZE = 100
+
+_SEVERITIES = members_by_value(AlertSeverity)
+
+# Fields needed to build an AlertResponse
+_ALERT_PROJECTION = {
+    "_id": 0,
+    "alert_id": 1,
+    "sensor_id": 1,
+    "severity": 1,
+    "message": 1,
+    "value": 1,
+    "threshold_violated": 1,
+    "created_at": 1,
+    "acknowledged": 1,
+    "acknowledged_at": 1,
+    "acknowledged_by": 1
+}
+
 
 @router.get("", response_model=list[AlertResponse])
-def list_alerts(
+async def list_alerts(
     sensor_id: Optional[str] = None,
     severity: Optional[AlertSeverity] = None,
     acknowledged: Optional[bool] = None,
     limit: int = Query(default=50, ge=1, le=500),
-    db: Database = Depends(get_db)
+    accept: Optional[str] = Header(default=None),
+    db: AsyncDatabase = Depends(get_read_db)
 ):
-    """Get recent alerts with optional filtering."""
+    """
+    Get recent alerts with optional filtering.
+
+    Send `Accept: application/x-ndjson` to stream one alert per line
+    instead of a JSON array.
+    """
     query = {}
 
     if sensor_id:
@@ -34,75 +72,110 @@ def list_alerts(
     if acknowledged is not None:
         query["acknowledged"] = acknowledged
 
-    alerts = list(
-        db.alerts.find(query)
+    cursor = (
+        db.alerts.find(query, _ALERT_PROJECTION)
         .sort("created_at", -1)
         .limit(limit)
     )
 
-    return [_doc_to_response(a) for a in alerts]
+    if accept and NDJSON_MEDIA_TYPE in accept:
+        return StreamingResponse(
+            _stream_ndjson(cursor.batch_size(NDJSON_BATCH_SIZE)),
+            media_type=NDJSON_MEDIA_TYPE
+        )
+
+    # Serialize straight from the cursor; response_model is kept for the docs
+    alerts = [_doc_to_dict(a) async for a in cursor]
+    return Response(content=orjson.dumps(alerts), media_type="application/json")
 
 
 @router.get("/{alert_id}", response_model=AlertResponse)
-def get_alert(alert_id: str, db: Database = Depends(get_db)):
+async def get_alert(alert_id: str, db: AsyncDatabase = Depends(get_db)):
     """Get a specific alert."""
-    alert = db.alerts.find_one({"alert_id": alert_id})
+    alert = await db.alerts.find_one(
+        {"alert_id": alert_id},
+        _ALERT_PROJECTION,
+        **index_hint("alerts", "alert_id_idx"),
+        comment="get_alert"
+    )
     if not alert:
         raise HTTPException(status_code=404, detail="Alert not found")
     return _doc_to_response(alert)
 
 
 @router.post("/{alert_id}/acknowledge", response_model=AlertResponse)
-def acknowledge_alert(
+async def acknowledge_alert(
     alert_id: str,
     request: AlertAcknowledgeRequest,
-    db: Database = Depends(get_db)
+    db: AsyncDatabase = Depends(get_db)
 ):
     """Acknowledge an alert."""
-    alert = db.alerts.find_one({"alert_id": alert_id})
-    if not alert:
+    now = datetime.fromtimestamp(_time(), _UTC)
+
+    updated = await db.alerts.find_one_and_update(
+        {"alert_id": alert_id},
+        {"$set": {
+            "acknowledged": True,
+            "acknowledged_at": now,
+            "acknowledged_by": request.user
+        }},
+        projection=_ALERT_PROJECTION,
+        return_document=ReturnDocument.AFTER,
+        **index_hint("alerts", "alert_id_idx"),
+        comment="acknowledge_alert"
+    )
+    if not updated:
         raise HTTPException(status_code=404, detail="Alert not found")
+    return _doc_to_response(updated)
 
-    now = datetime.now(timezone.utc)
 
-    db.alerts.update_one(
-        {"alert_id": alert_id},
+@router.post("/acknowledge-batch", response_model=AlertBulkAcknowledgeResponse)
+async def acknowledge_alerts(
+    request: AlertBulkAcknowledgeRequest,
+    db: AsyncDatabase = Depends(get_db)
+):
+    """Acknowledge many alerts in a single database operation."""
+    if not request.alert_ids:
+        return AlertBulkAcknowledgeResponse(requested=0, acknowledged=0)
+
+    now = datetime.fromtimestamp(_time(), _UTC)
+
+    result = await db.alerts.update_many(
+        {"alert_id": {"$in": request.alert_ids}},
         {"$set": {
             "acknowledged": True,
             "acknowledged_at": now,
             "acknowledged_by": request.user
         }}
     )
-
-    updated = db.alerts.find_one({"alert_id": alert_id})
-    return _doc_to_response(updated)
+    return AlertBulkAcknowledgeResponse(
+        requested=len(request.alert_ids),
+        acknowledged=result.modified_count
+    )
 
 
 @router.get("/unacknowledged/count")
-def count_unacknowledged(db: Database = Depends(get_db)):
+async def count_unacknowledged(db: AsyncDatabase = Depends(get_db)):
     """Get count of unacknowledged alerts by severity."""
-    pipeline = [
-        {"$match": {"acknowledged": False}},
-        {"$group": {"_id": "$severity", "count": {"$sum": 1}}}
-    ]
-    results = list(db.alerts.aggregate(pipeline))
-
-    counts = {"info": 0, "warning": 0, "critical": 0, "total": 0}
-    for r in results:
-        severity = r["_id"]
-        count = r["count"]
-        counts[severity] = count
-        counts["total"] += count
-
+    # One count per severity, each answered from the (acknowledged, severity)
+    # prefix of ack_severity_created_idx; the counts run concurrently
+    severities = [s.value for s in AlertSeverity]
+    results = await asyncio.gather(*(
+        db.alerts.count_documents({"acknowledged": False, "severity": severity})
+        for severity in severities
+    ))
+
+    counts = dict(zip(severities, results))
+    counts["total"] = sum(results)
     return counts
 
 
 def _doc_to_response(doc: dict) -> AlertResponse:
-    """Convert MongoDB document to response model."""
-    return AlertResponse(
+    """Convert MongoDB document to response model (DB data is trusted, so skip validation)."""
+    return AlertResponse.model_construct(
         alert_id=doc["alert_id"],
         sensor_id=doc["sensor_id"],
-        severity=AlertSeverity(doc["severity"]),
+        severity=_SEVERITIES[doc["severity"]],
         message=doc["message"],
         value=doc["value"],
         threshold_violated=doc.get("threshold_violated"),
@@ -111,3 +184,25 @@ def _doc_to_response(doc: dict) -> AlertResponse:
         acknowledged_at=doc.get("acknowledged_at"),
         acknowledged_by=doc.get("acknowledged_by")
     )
+
+
+def _doc_to_dict(doc: dict) -> dict:
+    """Convert a projected MongoDB document to an AlertResponse-shaped dict."""
+    return {
+        "alert_id": doc["alert_id"],
+        "sensor_id": doc["sensor_id"],
+        "severity": doc["severity"],
+        "message": doc["message"],
+        "value": doc["value"],
+        "threshold_violated": doc.get("threshold_violated"),
+        "created_at": doc["created_at"],
+        "acknowledged": doc.get("acknowledged", False),
+        "acknowledged_at": doc.get("acknowledged_at"),
+        "acknowledged_by": doc.get("acknowledged_by")
+    }
+
+
+async def _stream_ndjson(cursor) -> AsyncGenerator[bytes, None]:
+    """Yield alerts from a cursor as newline-delimited JSON."""
+    async for doc in cursor:
+        yield orjson.dumps(_doc_to_dict(doc)) + b"\n"
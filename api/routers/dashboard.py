@@ -6,191 +6,272 @@ Dashboard endpoints for iPad at-a-glance monitoring and log streaming.
 
 import os
 import asyncio
-from datetime import datetime, timedelta, timezone
+from datetime import datetime, timezone
 from typing import AsyncGenerator
 from fastapi import APIRouter, Depends, Query
 from fastapi.responses import StreamingResponse
-from pymongo.database import Database
+from pymongo.asynchronous.database import AsyncDatabase
 
-from api.database import get_db
+from api.cache import TTLCache
+from api.database import get_read_db, is_db_healthy
 from api.models.schemas import DashboardResponse, HabitatSummary
-from api.models.enums import ReptileSpecies, SystemHealth
+from api.pipelines import latest_reading_lookup
+from api.models.enums import ReptileSpecies, SystemHealth, members_by_value
 
 router = APIRouter(prefix="/dashboard", tags=["Dashboard"])
 
+_SPECIES = members_by_value(ReptileSpecies)
+
 # Path to shared log file (set via LOG_FILE env var in Docker)
 LOG_FILE = os.getenv("LOG_FILE", "/app/logs/service.log")
 
+# Log streaming: bytes read per read() call and delay between checks for new output
+LOG_READ_CHUNK = 64 * 1024
+LOG_POLL_SECONDS = 1
+# Block size used when reading the log backwards for the last N lines
+LOG_TAIL_BLOCK = 8192
+
 # Readings older than this are considered stale
 STALE_THRESHOLD_MINUTES = 10
 
-
-def celsius_to_fahrenheit(celsius: float | None) -> float | None:
-    """Convert Celsius to Fahrenheit."""
-    if celsius is None:
-        return None
-    return round((celsius * 9 / 5) + 32, 1)
-
-
-def get_habitat_status(
-    basking_temp: float | None,
-    cool_temp: float | None,
-    humidity: float | None,
-    requirements: dict | None,
-    is_stale: bool
-) -> str:
-    """Determine habitat status: ok, warning, or critical."""
-    if is_stale:
-        return "warning"
-
-    if not requirements:
-        return "ok" if basking_temp is not None else "warning"
-
-    # Check if any readings are out of range
-    critical = False
-    warning = False
-
-    if basking_temp is not None:
-        if basking_temp < requirements.get("basking_temp_min", 0) - 5:
-            critical = True
-        elif basking_temp < requirements.get("basking_temp_min", 0):
-            warning = True
-        elif basking_temp > requirements.get("basking_temp_max", 100) + 5:
-            critical = True
-        elif basking_temp > requirements.get("basking_temp_max", 100):
-            warning = True
-
-    if cool_temp is not None:
-        if cool_temp < requirements.get("cool_side_temp_min", 0) - 5:
-            critical = True
-        elif cool_temp < requirements.get("cool_side_temp_min", 0):
-            warning = True
-        elif cool_temp > requirements.get("cool_side_temp_max", 100) + 5:
-            critical = True
-        elif cool_temp > requirements.get("cool_side_temp_max", 100):
-            warning = True
-
-    if humidity is not None:
-        if humidity < requirements.get("humidity_min", 0) - 10:
-            critical = True
-        elif humidity < requirements.get("humidity_min", 0):
-            warning = True
-        elif humidity > requirements.get("humidity_max", 100) + 10:
-            critical = True
-        elif humidity > requirements.get("humidity_max", 100):
-            warning = True
-
-    if critical:
-        return "critical"
-    if warning:
-        return "warning"
-    return "ok"
+# Identical dashboard polls within this window are served from memory
+DASHBOARD_CACHE_SECONDS = 1.0
+_dashboard_cache = TTLCache(ttl=DASHBOARD_CACHE_SECONDS, maxsize=1)
+_dashboard_inflight: asyncio.Future | None = None
+
+
+# Readings checked for habitat status: (reading, requirement min key, requirement
+# max key, tolerance beyond the range before the habitat is critical)
+STATUS_CHECKS = (
+    ("basking", "basking_temp_min", "basking_temp_max", 5),
+    ("cool", "cool_side_temp_min", "cool_side_temp_max", 5),
+    ("humidity", "humidity_min", "humidity_max", 10),
+)
+
+# Projects a species' requirements down to the warning and critical bounds of
+# each checked reading, so the bounds are computed once per join instead of
+# inside every status branch.
+REQUIREMENT_LIMITS = {"$project": {"_id": 0, **{
+    reading: {
+        "warn_lo": {"$ifNull": [f"${min_key}", 0]},
+        "warn_hi": {"$ifNull": [f"${max_key}", 100]},
+        "crit_lo": {"$subtract": [{"$ifNull": [f"${min_key}", 0]}, tolerance]},
+        "crit_hi": {"$add": [{"$ifNull": [f"${max_key}", 100]}, tolerance]},
+    }
+    for reading, min_key, max_key, tolerance in STATUS_CHECKS
+}}}
+
+
+def _outlet_state_lookup(outlet_field: str, as_field: str) -> dict:
+    """$lookup stage joining the current state of the outlet named by outlet_field."""
+    return {"$lookup": {
+        "from": "outlet_states",
+        "localField": outlet_field,
+        "foreignField": "outlet_id",
+        "pipeline": [{"$limit": 1}, {"$project": {"_id": 0, "state": 1}}],
+        "as": as_field,
+    }}
+
+
+def _outside_range(reading: str, level: str) -> dict:
+    """Expression that is true when a reading is present and outside its warn or crit bounds."""
+    value = f"${reading}.value"
+    return {"$and": [
+        {"$ne": [{"$ifNull": [value, None]}, None]},
+        {"$or": [
+            {"$lt": [value, f"$limits.{reading}.{level}_lo"]},
+            {"$gt": [value, f"$limits.{reading}.{level}_hi"]},
+        ]},
+    ]}
+
+
+def _any_outside_range(level: str) -> dict:
+    """Expression that is true when any checked reading is outside its bounds at the given level."""
+    return {"$or": [_outside_range(reading, level) for reading, *_ in STATUS_CHECKS]}
+
+
+def _celsius_to_fahrenheit(celsius: str) -> dict:
+    """Expression converting a Celsius value to Fahrenheit, rounded to 0.1 (null stays null)."""
+    return {"$round": [{"$add": [{"$multiply": [celsius, 1.8]}, 32]}, 1]}
+
+
+def _status_count(status: str) -> dict:
+    """Expression counting joined habitats with the given status."""
+    return {"$size": {"$filter": {"input": "$habitats", "cond": {"$eq": ["$$this.status", status]}}}}
+
+
+# Habitat status: stale readings warn, habitats without requirements are ok as
+# long as a basking reading exists, otherwise readings beyond the tolerance
+# margins are critical and any out-of-range reading is a warning.
+HABITAT_STATUS = {"$switch": {
+    "branches": [
+        {"case": {"$or": [
+            {"$eq": [{"$ifNull": ["$last_reading", None]}, None]},
+            {"$lt": ["$last_reading", {"$dateSubtract": {
+                "startDate": "$$NOW", "unit": "minute", "amount": STALE_THRESHOLD_MINUTES,
+            }}]},
+        ]}, "then": "warning"},
+        {"case": {"$eq": [{"$ifNull": ["$limits", None]}, None]},
+         "then": {"$cond": [{"$ne": [{"$ifNull": ["$basking.value", None]}, None]}, "ok", "warning"]}},
+        {"case": _any_outside_range("crit"), "then": "critical"},
+        {"case": _any_outside_range("warn"), "then": "warning"},
+    ],
+    "default": "ok",
+}}
+
+
+# Everything the dashboard needs in one round-trip: each habitat joined with
+# its latest readings, species requirements and outlet states, plus the active
+# alert count and day/night mode. Seeded from $documents rather than a $facet
+# over habitats so the alert count and mode still come back when no habitats
+# exist. Habitat status and the per-status counts are evaluated server-side,
+# so only summary fields come back. Backed by sensor_timestamp_idx,
+# outlet_id_idx and species_idx.
+DASHBOARD_PIPELINE = [
+    {"$documents": [{}]},
+    {"$lookup": {
+        "from": "habitats",
+        "pipeline": [
+            {"$project": {
+                "_id": 0,
+                "habitat_id": 1,
+                "name": 1,
+                "species": 1,
+                "basking_temp_sensor_id": 1,
+                "cool_temp_sensor_id": 1,
+                "humidity_sensor_id": 1,
+                "heat_lamp_outlet_id": 1,
+                "uvb_outlet_id": 1,
+            }},
+            latest_reading_lookup("basking_temp_sensor_id", "basking"),
+            latest_reading_lookup("cool_temp_sensor_id", "cool"),
+            latest_reading_lookup("humidity_sensor_id", "humidity"),
+            {"$lookup": {
+                "from": "habitat_requirements",
+                "localField": "species",
+                "foreignField": "species",
+                "pipeline": [{"$limit": 1}, REQUIREMENT_LIMITS],
+                "as": "limits",
+            }},
+            _outlet_state_lookup("heat_lamp_outlet_id", "heat_lamp"),
+            _outlet_state_lookup("uvb_outlet_id", "uvb"),
+            {"$set": {
+                "basking": {"$first": "$basking"},
+                "cool": {"$first": "$cool"},
+                "humidity": {"$first": "$humidity"},
+                "limits": {"$first": "$limits"},
+            }},
+            {"$set": {"last_reading": {"$max": [
+                "$basking.timestamp", "$cool.timestamp", "$humidity.timestamp",
+            ]}}},
+            {"$project": {
+                "_id": 0,
+                "habitat_id": 1,
+                "name": 1,
+                "species": 1,
+                "status": HABITAT_STATUS,
+                "basking_temp_f": _celsius_to_fahrenheit("$basking.value"),
+                "cool_temp_f": _celsius_to_fahrenheit("$cool.value"),
+                "humidity": {"$round": ["$humidity.value", 1]},
+                "heat_lamp": {"$first": "$heat_lamp.state"},
+                "uvb": {"$first": "$uvb.state"},
+                "last_reading": 1,
+            }},
+        ],
+        "as": "habitats",
+    }},
+    {"$set": {
+        "habitats_ok": _status_count("ok"),
+        "habitats_warning": _status_count("warning"),
+        "habitats_critical": _status_count("critical"),
+    }},
+    {"$lookup": {
+        "from": "alerts",
+        "pipeline": [{"$match": {"acknowledged": False}}, {"$count": "count"}],
+        "as": "active_alerts",
+    }},
+    {"$lookup": {
+        "from": "day_night_state",
+        "pipeline": [{"$limit": 1}, {"$project": {"_id": 0, "mode": 1}}],
+        "as": "day_night_state",
+    }},
+]
 
 
 @router.get("", response_model=DashboardResponse)
-def get_dashboard(db: Database = Depends(get_db)):
+async def get_dashboard(db: AsyncDatabase = Depends(get_read_db)):
     """
     Get all habitats at a glance - designed for iPad monitoring.
 
     Returns a compact view of all habitats with current conditions,
     outlet states, and overall system health.
     """
+    global _dashboard_inflight
+    cached = _dashboard_cache.get("dashboard")
+    if cached is not None:
+        return cached
+
+    # Single-flight: concurrent pollers share one in-progress build
+    if _dashboard_inflight is None:
+        _dashboard_inflight = asyncio.ensure_future(_build_dashboard(db))
+        _dashboard_inflight.add_done_callback(_store_dashboard)
+    # Shielded so one client disconnecting doesn't cancel the shared build
+    return await asyncio.shield(_dashboard_inflight)
+
+
+def _store_dashboard(task: asyncio.Future) -> None:
+    """Cache a finished dashboard build and clear the in-flight slot."""
+    global _dashboard_inflight
+    _dashboard_inflight = None
+    if not task.cancelled() and task.exception() is None:
+        _dashboard_cache.set("dashboard", task.result())
+
+
+async def _build_dashboard(db: AsyncDatabase) -> DashboardResponse:
+    """Run the dashboard aggregation and assemble the response (DB data is trusted, so skip validation)."""
     now = datetime.now(timezone.utc)
-    stale_cutoff = now - timedelta(minutes=STALE_THRESHOLD_MINUTES)
 
-    # Get all habitats
-    habitats = list(db.habitats.find({}))
+    # Request-path pipelines are index-driven and small; fail rather than
+    # silently spill to disk if that ever stops being true
+    cursor = await db.aggregate(DASHBOARD_PIPELINE, allowDiskUse=False)
+    overview = (await cursor.to_list(length=1))[0]
+    habitats = overview["habitats"]
+    ok_count = overview["habitats_ok"]
+    warning_count = overview["habitats_warning"]
+    critical_count = overview["habitats_critical"]
 
     habitat_summaries = []
-    ok_count = 0
-    warning_count = 0
-    critical_count = 0
-
     for habitat in habitats:
         habitat_id = habitat["habitat_id"]
-
-        # Get latest readings for each sensor
-        basking_reading = db.sensor_readings.find_one(
-            {"sensor_id": habitat.get("basking_temp_sensor_id")},
-            sort=[("timestamp", -1)]
-        )
-        cool_reading = db.sensor_readings.find_one(
-            {"sensor_id": habitat.get("cool_temp_sensor_id")},
-            sort=[("timestamp", -1)]
-        )
-        humidity_reading = db.sensor_readings.find_one(
-            {"sensor_id": habitat.get("humidity_sensor_id")},
-            sort=[("timestamp", -1)]
-        )
-
-        # Get values in Celsius
-        basking_temp_c = basking_reading["value"] if basking_reading else None
-        cool_temp_c = cool_reading["value"] if cool_reading else None
-        humidity = humidity_reading["value"] if humidity_reading else None
-
-        # Determine the latest reading timestamp
-        reading_times = []
-        if basking_reading:
-            reading_times.append(basking_reading["timestamp"])
-        if cool_reading:
-            reading_times.append(cool_reading["timestamp"])
-        if humidity_reading:
-            reading_times.append(humidity_reading["timestamp"])
-
-        last_reading = max(reading_times) if reading_times else None
-        is_stale = last_reading is None or last_reading < stale_cutoff
-
-        # Get species requirements
-        requirements = db.habitat_requirements.find_one({"species": habitat.get("species")})
-
-        # Get outlet states
-        heat_lamp_state = db.outlet_states.find_one({"outlet_id": habitat.get("heat_lamp_outlet_id")})
-        uvb_state = db.outlet_states.find_one({"outlet_id": habitat.get("uvb_outlet_id")})
-
-        # Determine overall habitat status
-        status = get_habitat_status(basking_temp_c, cool_temp_c, humidity, requirements, is_stale)
-
-        if status == "ok":
-            ok_count += 1
-        elif status == "warning":
-            warning_count += 1
-        else:
-            critical_count += 1
-
-        summary = HabitatSummary(
+        habitat_summaries.append(HabitatSummary.model_construct(
             habitat_id=habitat_id,
             name=habitat.get("name", habitat_id),
-            species=ReptileSpecies(habitat.get("species", "leopard_gecko")),
-            status=status,
-            basking_temp_f=celsius_to_fahrenheit(basking_temp_c),
-            cool_temp_f=celsius_to_fahrenheit(cool_temp_c),
-            humidity=round(humidity, 1) if humidity else None,
-            heat_lamp=heat_lamp_state.get("state", "unknown") if heat_lamp_state else "unknown",
-            uvb=uvb_state.get("state", "unknown") if uvb_state else "unknown",
-            last_reading=last_reading
-        )
-        habitat_summaries.append(summary)
-
-    # Determine system status
-    try:
-        db.command("ping")
-        if critical_count > 0:
-            system_status = SystemHealth.UNHEALTHY
-        elif warning_count > 0:
-            system_status = SystemHealth.DEGRADED
-        else:
-            system_status = SystemHealth.HEALTHY
-    except Exception:
+            species=_SPECIES[habitat.get("species", "leopard_gecko")],
+            status=habitat["status"],
+            basking_temp_f=habitat.get("basking_temp_f"),
+            cool_temp_f=habitat.get("cool_temp_f"),
+            humidity=habitat.get("humidity"),
+            heat_lamp=habitat.get("heat_lamp") or "unknown",
+            uvb=habitat.get("uvb") or "unknown",
+            last_reading=habitat.get("last_reading")
+        ))
+
+    # Determine system status (database reachability comes from the background probe)
+    if critical_count > 0 or not is_db_healthy():
         system_status = SystemHealth.UNHEALTHY
+    elif warning_count > 0:
+        system_status = SystemHealth.DEGRADED
+    else:
+        system_status = SystemHealth.HEALTHY
 
-    # Get day/night mode from stored state (if available)
-    day_night_state = db.day_night_state.find_one({})
-    mode = day_night_state.get("mode", "day") if day_night_state else "day"
+    # Day/night mode from stored state (if available)
+    day_night_state = overview["day_night_state"]
+    mode = day_night_state[0].get("mode", "day") if day_night_state else "day"
 
-    # Count active (unacknowledged) alerts
-    active_alerts = db.alerts.count_documents({"acknowledged": False})
+    # Active (unacknowledged) alerts
+    active_alerts = overview["active_alerts"][0]["count"] if overview["active_alerts"] else 0
 
-    return DashboardResponse(
+    return DashboardResponse.model_construct(
         timestamp=now,
         system_status=system_status,
         mode=mode,
@@ -203,10 +284,45 @@ def get_dashboard(db: Database = Depends(get_db)):
     )
 
 
+def _read_recent_lines(path: str, lines: int) -> tuple[list[str], int]:
+    """
+    Return the last N lines of a file and the byte offset of its end.
+
+    Reads backwards from EOF in LOG_TAIL_BLOCK chunks, so the cost depends on
+    the number of lines requested rather than the size of the file.
+    """
+    with open(path, 'rb') as f:
+        end = f.seek(0, os.SEEK_END)
+        position = end
+        buf = b""
+        # Need one newline more than requested: the file normally ends in one
+        while position > 0 and buf.count(b"\n") <= lines:
+            step = min(LOG_TAIL_BLOCK, position)
+            position -= step
+            f.seek(position)
+            buf = f.read(step) + buf
+    recent_lines = buf.splitlines()[-lines:]
+    return [line.decode(errors='replace').rstrip() for line in recent_lines], end
+
+
+def _is_rotated(log) -> bool:
+    """Whether LOG_FILE now names a different file than the open handle."""
+    try:
+        return os.stat(LOG_FILE).st_ino != os.fstat(log.fileno()).st_ino
+    except FileNotFoundError:
+        # Moved away and not recreated yet; keep following the old file
+        return False
+
+
+def _sse_frame(lines: list[str]) -> str:
+    """Pack lines into one SSE event; clients receive them joined by newlines."""
+    return "".join(f"data: {line}\n" for line in lines) + "\n"
+
+
 async def tail_log_file(lines: int = 100) -> AsyncGenerator[str, None]:
     """
     Async generator that tails the service log file.
-    Yields new lines as Server-Sent Events.
+    Yields new lines as Server-Sent Events, one event per batch of lines.
     """
     # Try to read from log file
     if not os.path.exists(LOG_FILE):
@@ -219,31 +335,49 @@ async def tail_log_file(lines: int = 100) -> AsyncGenerator[str, None]:
     # First, send the last N lines
     if os.path.exists(LOG_FILE):
         try:
-            with open(LOG_FILE, 'r') as f:
-                # Read all lines and get the last N
-                all_lines = f.readlines()
-                recent_lines = all_lines[-lines:] if len(all_lines) > lines else all_lines
-                for line in recent_lines:
-                    yield f"data: {line.rstrip()}\n\n"
-                last_position = f.tell()
+            recent_lines, last_position = await asyncio.to_thread(_read_recent_lines, LOG_FILE, lines)
+            if recent_lines:
+                yield _sse_frame(recent_lines)
         except Exception as e:
             yield f"data: Error reading log file: {e}\n\n"
 
-    # Then continuously check for new lines
-    while True:
-        try:
-            if os.path.exists(LOG_FILE):
-                with open(LOG_FILE, 'r') as f:
-                    f.seek(last_position)
-                    new_lines = f.readlines()
-                    for line in new_lines:
-                        yield f"data: {line.rstrip()}\n\n"
-                    last_position = f.tell()
-        except Exception as e:
-            yield f"data: Error: {e}\n\n"
-
-        # Wait before checking again
-        await asyncio.sleep(1)
+    # Then follow the file through one handle kept open for the connection,
+    # reading only when fstat shows it has grown. Disk reads run in a worker
+    # thread so they never block the event loop.
+    log = None
+    pending = b""
+    try:
+        while True:
+            try:
+                if log is None and os.path.exists(LOG_FILE):
+                    log = await asyncio.to_thread(open, LOG_FILE, 'rb')
+                    log.seek(last_position)
+                if log is not None:
+                    size = os.fstat(log.fileno()).st_size
+                    if size < log.tell():
+                        # Truncated in place: start again from the top
+                        log.seek(0)
+                        pending = b""
+                    if size > log.tell():
+                        while chunk := await asyncio.to_thread(log.read, LOG_READ_CHUNK):
+                            # Hold back a trailing partial line until it is complete
+                            *new_lines, pending = (pending + chunk).split(b"\n")
+                            if new_lines:
+                                yield _sse_frame([line.decode(errors='replace').rstrip() for line in new_lines])
+                    if _is_rotated(log):
+                        # The old file is drained; pick up the new one next tick
+                        log.close()
+                        log = None
+                        last_position = 0
+                        pending = b""
+            except Exception as e:
+                yield f"data: Error: {e}\n\n"
+
+            # Wait before checking again
+            await asyncio.sleep(LOG_POLL_SECONDS)
+    finally:
+        if log is not None:
+            log.close()
 
 
 @router.get("/logs/stream")
@@ -257,6 +391,9 @@ async def stream_logs(lines: int = Query(default=100, ge=1, le=1000)):
         const eventSource = new EventSource('/api/dashboard/logs/stream');
         eventSource.onmessage = (event) => console.log(event.data);
 
+    Lines that arrive together are delivered as one event whose data holds
+    them separated by newlines.
+
     Args:
         lines: Number of recent log lines to show initially (default: 100)
     """
@@ -290,13 +427,11 @@ def get_recent_logs(
         }
 
     try:
-        with open(LOG_FILE, 'r') as f:
-            all_lines = f.readlines()
-            recent_lines = all_lines[-lines:] if len(all_lines) > lines else all_lines
-            return {
-                "logs": [line.rstrip() for line in recent_lines],
-                "count": len(recent_lines)
-            }
+        recent_lines, _ = _read_recent_lines(LOG_FILE, lines)
+        return {
+            "logs": recent_lines,
+            "count": len(recent_lines)
+        }
     except Exception as e:
         return {
             "logs": [f"Error reading log file: {e}"],
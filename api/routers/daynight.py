@@ -4,11 +4,14 @@
 Day/Night control endpoints for the Reptilia API.
 """
 
-from datetime import datetime, timezone, date
+import asyncio
+from datetime import datetime, timezone, date, time
 from typing import Optional
 from fastapi import APIRouter, Depends, Query
-from pymongo.database import Database
+from pymongo.asynchronous.database import AsyncDatabase
+from pymongo import ReturnDocument
 
+from api.cache import TTLCache
 from api.database import get_db
 from api.models.schemas import (
     DayNightStatusResponse,
@@ -26,27 +29,48 @@ DEFAULT_SUNRISE_MINUTE = 0
 DEFAULT_SUNSET_HOUR = 19
 DEFAULT_SUNSET_MINUTE = 0
 
+_SUNRISE = time(DEFAULT_SUNRISE_HOUR, DEFAULT_SUNRISE_MINUTE, tzinfo=timezone.utc)
+_SUNSET = time(DEFAULT_SUNSET_HOUR, DEFAULT_SUNSET_MINUTE, tzinfo=timezone.utc)
 
-@router.get("/status", response_model=DayNightStatusResponse)
-def get_daynight_status(db: Database = Depends(get_db)):
-    """Get current day/night status."""
+# The forced-mode config is read on every status poll; the write endpoints
+# below refresh it, so a short TTL only bounds staleness across workers
+_config_cache = TTLCache(ttl=2.0, maxsize=1)
+
+# Habitats are rarely added or removed
+HABITAT_IDS_TTL_SECONDS = 60
+_habitat_ids_cache = TTLCache(ttl=HABITAT_IDS_TTL_SECONDS, maxsize=1)
+
+
+async def _get_config(db: AsyncDatabase) -> dict | None:
+    """Get the current day/night config document, cached briefly."""
+    config = _config_cache.get("current")
+    if config is None:
+        config = await db.daynight_config.find_one({"_id": "current"})
+        if config is not None:
+            _config_cache.set("current", config)
+    return config
+
+
+async def _get_habitat_ids(db: AsyncDatabase) -> list[str]:
+    """Get the registered habitat ids, cached for HABITAT_IDS_TTL_SECONDS."""
+    habitat_ids = _habitat_ids_cache.get("all")
+    if habitat_ids is None:
+        habitats = await db.habitats.find({}, {"_id": 0, "habitat_id": 1}).to_list(length=None)
+        habitat_ids = [h["habitat_id"] for h in habitats]
+        _habitat_ids_cache.set("all", habitat_ids)
+    return habitat_ids
+
+
+def _build_status(config: dict | None, habitat_ids: list[str]) -> DayNightStatusResponse:
+    """Build the day/night status from the config document and habitat ids."""
     now = datetime.now(timezone.utc)
     today = now.date()
 
     # Get or calculate sun times
-    sunrise = datetime(
-        today.year, today.month, today.day,
-        DEFAULT_SUNRISE_HOUR, DEFAULT_SUNRISE_MINUTE,
-        tzinfo=timezone.utc
-    )
-    sunset = datetime(
-        today.year, today.month, today.day,
-        DEFAULT_SUNSET_HOUR, DEFAULT_SUNSET_MINUTE,
-        tzinfo=timezone.utc
-    )
+    sunrise = datetime.combine(today, _SUNRISE)
+    sunset = datetime.combine(today, _SUNSET)
 
-    # Check for forced mode in database
-    config = db.daynight_config.find_one({"_id": "current"})
+    # Check for forced mode
     if config and config.get("forced_mode"):
         is_day = config["forced_mode"] == "day"
         mode = DayNightMode.DAY if is_day else DayNightMode.NIGHT
@@ -55,10 +79,6 @@ def get_daynight_status(db: Database = Depends(get_db)):
         is_day = sunrise <= now <= sunset
         mode = DayNightMode.DAY if is_day else DayNightMode.NIGHT
 
-    # Get registered habitats
-    habitats = list(db.habitats.find({}, {"habitat_id": 1}))
-    habitat_ids = [h["habitat_id"] for h in habitats]
-
     return DayNightStatusResponse(
         mode=mode,
         is_day_mode=is_day,
@@ -70,32 +90,47 @@ def get_daynight_status(db: Database = Depends(get_db)):
     )
 
 
+async def _set_forced_mode(db: AsyncDatabase, forced_mode: str | None) -> DayNightStatusResponse:
+    """Write the forced mode and build the status from the updated document in one round-trip."""
+    config, habitat_ids = await asyncio.gather(
+        db.daynight_config.find_one_and_update(
+            {"_id": "current"},
+            {"$set": {
+                "forced_mode": forced_mode,
+                "last_mode_change": datetime.now(timezone.utc)
+            }},
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        ),
+        _get_habitat_ids(db)
+    )
+    _config_cache.set("current", config)
+    return _build_status(config, habitat_ids)
+
+
+@router.get("/status", response_model=DayNightStatusResponse)
+async def get_daynight_status(db: AsyncDatabase = Depends(get_db)):
+    """Get current day/night status."""
+    config, habitat_ids = await asyncio.gather(_get_config(db), _get_habitat_ids(db))
+    return _build_status(config, habitat_ids)
+
+
 @router.get("/sun-times", response_model=SunTimesResponse)
-def get_sun_times(
+async def get_sun_times(
     date_str: Optional[str] = Query(default=None, alias="date"),
-    db: Database = Depends(get_db)
+    db: AsyncDatabase = Depends(get_db)
 ):
     """Get sunrise and sunset times."""
+    now = datetime.now(timezone.utc)
+    query_date = now.date()
     if date_str:
         try:
             query_date = date.fromisoformat(date_str)
         except ValueError:
-            query_date = date.today()
-    else:
-        query_date = date.today()
+            pass
 
-    sunrise = datetime(
-        query_date.year, query_date.month, query_date.day,
-        DEFAULT_SUNRISE_HOUR, DEFAULT_SUNRISE_MINUTE,
-        tzinfo=timezone.utc
-    )
-    sunset = datetime(
-        query_date.year, query_date.month, query_date.day,
-        DEFAULT_SUNSET_HOUR, DEFAULT_SUNSET_MINUTE,
-        tzinfo=timezone.utc
-    )
-
-    now = datetime.now(timezone.utc)
+    sunrise = datetime.combine(query_date, _SUNRISE)
+    sunset = datetime.combine(query_date, _SUNSET)
     is_daytime = sunrise <= now <= sunset
 
     return SunTimesResponse(
@@ -107,35 +142,12 @@ def get_sun_times(
 
 
 @router.post("/force-mode", response_model=DayNightStatusResponse)
-def force_mode(request: ForceModeRequest, db: Database = Depends(get_db)):
+async def force_mode(request: ForceModeRequest, db: AsyncDatabase = Depends(get_db)):
     """Force day or night mode (for testing/override)."""
-    now = datetime.now(timezone.utc)
-
-    db.daynight_config.update_one(
-        {"_id": "current"},
-        {"$set": {
-            "forced_mode": request.mode.value,
-            "last_mode_change": now
-        }},
-        upsert=True
-    )
-
-    # Return updated status
-    return get_daynight_status(db)
+    return await _set_forced_mode(db, request.mode.value)
 
 
 @router.post("/auto-mode", response_model=DayNightStatusResponse)
-def auto_mode(db: Database = Depends(get_db)):
+async def auto_mode(db: AsyncDatabase = Depends(get_db)):
     """Clear forced mode and return to automatic sun-based control."""
-    now = datetime.now(timezone.utc)
-
-    db.daynight_config.update_one(
-        {"_id": "current"},
-        {"$set": {
-            "forced_mode": None,
-            "last_mode_change": now
-        }},
-        upsert=True
-    )
-
-    return get_daynight_status(db)
+    return await _set_forced_mode(db, None)
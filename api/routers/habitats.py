@@ -5,10 +5,15 @@ Habitat endpoints for the Reptilia API.
 """
 
 from datetime import datetime, timedelta, timezone
-from fastapi import APIRouter, Depends, HTTPException
-from pymongo.database import Database
-
-from api.database import get_db
+from typing import AsyncGenerator, Optional
+import orjson
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
+from fastapi.responses import Response, StreamingResponse
+from pymongo.asynchronous.database import AsyncDatabase
+
+from api.database import get_db, get_read_db
+from api.pipelines import latest_reading_lookup
+from api.rollups import ROLLUP_COLLECTION
 from api.models.schemas import (
     HabitatCreate,
     HabitatResponse,
@@ -17,176 +22,176 @@ from api.models.schemas import (
     IdealConditions,
     SensorStatusMap,
     SensorReadingsListResponse,
-    SensorReadingResponse,
     SensorHardwareConfig,
     OutletHardwareConfig,
     PowerStripConfig,
     SensorLocation
 )
-from api.models.enums import ReptileSpecies, ThresholdStatus, SensorUnit
+from api.models.enums import ReptileSpecies, ThresholdStatus, members_by_value
 
 router = APIRouter(prefix="/habitats", tags=["Habitats"])
 
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+# Readings fetched per cursor batch: fewer round-trips without holding a whole window
+READINGS_BATCH_SIZE = 1000
+
+# Fields needed to build a SensorReadingResponse
+_READING_PROJECTION = {"_id": 0, "value": 1, "timestamp": 1, "unit": 1, "is_valid": 1}
+
+_SPECIES = members_by_value(ReptileSpecies)
+_LOCATIONS = members_by_value(SensorLocation)
+
+# Habitat fields holding outlet ids, reported by the status endpoint
+OUTLET_KEYS = ("heat_lamp_outlet_id", "ceramic_heater_outlet_id", "uvb_outlet_id", "humidifier_outlet_id")
+
+# Fields read back for HabitatResponse
+_HABITAT_PROJECTION = {
+    "_id": 0,
+    "habitat_id": 1,
+    "name": 1,
+    "species": 1,
+    "basking_temp_sensor_id": 1,
+    "cool_temp_sensor_id": 1,
+    "humidity_sensor_id": 1,
+    **{key: 1 for key in OUTLET_KEYS},
+    "sensors": 1,
+    "power_strip": 1,
+}
+
+# Fields the status endpoint needs, plus its outlet ids gathered for one $lookup
+_STATUS_PROJECTION = {
+    "_id": 0,
+    "name": 1,
+    "species": 1,
+    "basking_temp_sensor_id": 1,
+    "cool_temp_sensor_id": 1,
+    "humidity_sensor_id": 1,
+    **{key: 1 for key in OUTLET_KEYS},
+    "outlet_ids": [f"${key}" for key in OUTLET_KEYS],
+}
+
+# Sensor id fields, used to gather a habitat's readings
+_SENSOR_ID_PROJECTION = {
+    "_id": 0,
+    "basking_temp_sensor_id": 1,
+    "cool_temp_sensor_id": 1,
+    "humidity_sensor_id": 1,
+}
+
 
 @router.get("", response_model=list[HabitatResponse])
-def list_habitats(db: Database = Depends(get_db)):
-    """List all configured habitats."""
-    habitats = list(db.habitats.find({}))
-    return [_doc_to_response(h) for h in habitats]
+async def list_habitats(
+    limit: int = Query(default=100, ge=1, le=1000),
+    after: Optional[str] = None,
+    db: AsyncDatabase = Depends(get_read_db)
+):
+    """
+    List configured habitats, ordered by habitat_id.
+
+    Pass the last habitat_id of a page as `after` to fetch the next one.
+    """
+    query = {"habitat_id": {"$gt": after}} if after else {}
+    cursor = db.habitats.find(query, _HABITAT_PROJECTION).sort("habitat_id", 1).limit(limit)
+    return [_doc_to_response(h) async for h in cursor]
 
 
 @router.get("/{habitat_id}", response_model=HabitatResponse)
-def get_habitat(habitat_id: str, db: Database = Depends(get_db)):
+async def get_habitat(habitat_id: str, db: AsyncDatabase = Depends(get_db)):
     """Get a specific habitat configuration."""
-    habitat = db.habitats.find_one({"habitat_id": habitat_id})
+    habitat = await db.habitats.find_one({"habitat_id": habitat_id}, _HABITAT_PROJECTION)
     if not habitat:
         raise HTTPException(status_code=404, detail="Habitat not found")
     return _doc_to_response(habitat)
 
 
 @router.post("", response_model=HabitatResponse, status_code=201)
-def create_habitat(habitat: HabitatCreate, db: Database = Depends(get_db)):
+async def create_habitat(habitat: HabitatCreate, db: AsyncDatabase = Depends(get_db)):
     """Create a new habitat configuration with optional embedded hardware config."""
     # Check if habitat already exists
-    existing = db.habitats.find_one({"habitat_id": habitat.habitat_id})
+    existing = await db.habitats.find_one({"habitat_id": habitat.habitat_id})
     if existing:
         raise HTTPException(status_code=409, detail="Habitat already exists")
 
-    # Build embedded sensors document
-    sensors_docs = []
-    if habitat.sensors:
-        for sensor in habitat.sensors:
-            sensors_docs.append({
-                "sensor_id": sensor.sensor_id,
-                "ble_address": sensor.ble_address,
-                "location": sensor.location.value,
-                "device_type": sensor.device_type
-            })
-
-    # Build embedded power_strip document
-    power_strip_doc = None
-    if habitat.power_strip:
-        outlets_docs = []
-        for outlet in habitat.power_strip.outlets:
-            outlets_docs.append({
-                "outlet_id": outlet.outlet_id,
-                "plug_number": outlet.plug_number
-            })
-        power_strip_doc = {
-            "strip_id": habitat.power_strip.strip_id,
-            "ip": habitat.power_strip.ip,
-            "username": habitat.power_strip.username,
-            "password": habitat.power_strip.password,
-            "outlets": outlets_docs
-        }
-
-    doc = {
-        "habitat_id": habitat.habitat_id,
-        "name": habitat.name,
-        "species": habitat.species.value,
-        "sensors": sensors_docs,
-        "power_strip": power_strip_doc,
-        "basking_temp_sensor_id": habitat.sensor_config.basking_temp,
-        "cool_temp_sensor_id": habitat.sensor_config.cool_temp,
-        "humidity_sensor_id": habitat.sensor_config.humidity,
-        "heat_lamp_outlet_id": habitat.outlet_config.heat_lamp,
-        "ceramic_heater_outlet_id": habitat.outlet_config.ceramic_heater,
-        "uvb_outlet_id": habitat.outlet_config.uvb,
-        "humidifier_outlet_id": habitat.outlet_config.humidifier
-    }
-
-    db.habitats.insert_one(doc)
+    doc = _habitat_to_doc(habitat, habitat.habitat_id)
+    await db.habitats.insert_one(doc)
+    await _tag_thresholds(db, habitat.habitat_id, _sensor_ids(doc))
     return _doc_to_response(doc)
 
 
 @router.put("/{habitat_id}", response_model=HabitatResponse)
-def update_habitat(
+async def update_habitat(
     habitat_id: str,
     habitat: HabitatCreate,
-    db: Database = Depends(get_db)
+    db: AsyncDatabase = Depends(get_db)
 ):
     """Update an existing habitat configuration with optional hardware config."""
-    existing = db.habitats.find_one({"habitat_id": habitat_id})
+    existing = await db.habitats.find_one({"habitat_id": habitat_id})
     if not existing:
         raise HTTPException(status_code=404, detail="Habitat not found")
 
-    # Build embedded sensors document
-    sensors_docs = []
-    if habitat.sensors:
-        for sensor in habitat.sensors:
-            sensors_docs.append({
-                "sensor_id": sensor.sensor_id,
-                "ble_address": sensor.ble_address,
-                "location": sensor.location.value,
-                "device_type": sensor.device_type
-            })
-
-    # Build embedded power_strip document
-    power_strip_doc = None
-    if habitat.power_strip:
-        outlets_docs = []
-        for outlet in habitat.power_strip.outlets:
-            outlets_docs.append({
-                "outlet_id": outlet.outlet_id,
-                "plug_number": outlet.plug_number
-            })
-        power_strip_doc = {
-            "strip_id": habitat.power_strip.strip_id,
-            "ip": habitat.power_strip.ip,
-            "username": habitat.power_strip.username,
-            "password": habitat.power_strip.password,
-            "outlets": outlets_docs
-        }
-
-    doc = {
-        "habitat_id": habitat_id,
-        "name": habitat.name,
-        "species": habitat.species.value,
-        "sensors": sensors_docs,
-        "power_strip": power_strip_doc,
-        "basking_temp_sensor_id": habitat.sensor_config.basking_temp,
-        "cool_temp_sensor_id": habitat.sensor_config.cool_temp,
-        "humidity_sensor_id": habitat.sensor_config.humidity,
-        "heat_lamp_outlet_id": habitat.outlet_config.heat_lamp,
-        "ceramic_heater_outlet_id": habitat.outlet_config.ceramic_heater,
-        "uvb_outlet_id": habitat.outlet_config.uvb,
-        "humidifier_outlet_id": habitat.outlet_config.humidifier
-    }
-
-    db.habitats.update_one({"habitat_id": habitat_id}, {"$set": doc})
+    doc = _habitat_to_doc(habitat, habitat_id)
+    await db.habitats.update_one({"habitat_id": habitat_id}, {"$set": doc})
+    await _tag_thresholds(db, habitat_id, _sensor_ids(doc))
     return _doc_to_response(doc)
 
 
 @router.delete("/{habitat_id}", status_code=204)
-def delete_habitat(habitat_id: str, db: Database = Depends(get_db)):
+async def delete_habitat(habitat_id: str, db: AsyncDatabase = Depends(get_db)):
     """Delete a habitat configuration."""
-    result = db.habitats.delete_one({"habitat_id": habitat_id})
+    result = await db.habitats.delete_one({"habitat_id": habitat_id})
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Habitat not found")
+    await _tag_thresholds(db, habitat_id, [])
 
 
 @router.get("/{habitat_id}/status", response_model=HabitatStatusResponse)
-def get_habitat_status(habitat_id: str, db: Database = Depends(get_db)):
+async def get_habitat_status(habitat_id: str, db: AsyncDatabase = Depends(get_db)):
     """Get comprehensive habitat status."""
-    habitat = db.habitats.find_one({"habitat_id": habitat_id})
-    if not habitat:
+    # Habitat, requirements, latest readings and outlet states in one round-trip
+    cursor = await db.habitats.aggregate([
+        {"$match": {"habitat_id": habitat_id}},
+        {"$limit": 1},
+        {"$project": _STATUS_PROJECTION},
+        {"$lookup": {
+            "from": "habitat_requirements",
+            "localField": "species",
+            "foreignField": "species",
+            "pipeline": [{"$limit": 1}, {"$project": {"_id": 0}}],
+            "as": "requirements",
+        }},
+        latest_reading_lookup("basking_temp_sensor_id", "basking"),
+        latest_reading_lookup("cool_temp_sensor_id", "cool"),
+        latest_reading_lookup("humidity_sensor_id", "humidity"),
+        {"$lookup": {
+            "from": "outlet_states",
+            "localField": "outlet_ids",
+            "foreignField": "outlet_id",
+            "pipeline": [{"$project": {"_id": 0, "outlet_id": 1, "state": 1}}],
+            "as": "outlet_states",
+        }},
+        {"$set": {
+            "requirements": {"$first": "$requirements"},
+            "basking": {"$first": "$basking.value"},
+            "cool": {"$first": "$cool.value"},
+            "humidity": {"$first": "$humidity.value"},
+        }},
+    ], allowDiskUse=False)
+    docs = await cursor.to_list(length=1)
+    if not docs:
         raise HTTPException(status_code=404, detail="Habitat not found")
+    habitat = docs[0]
 
-    # Get species requirements
-    requirements = db.habitat_requirements.find_one({"species": habitat["species"]})
-
-    # Get latest sensor readings
-    basking_reading = _get_latest_reading(db, habitat["basking_temp_sensor_id"])
-    cool_reading = _get_latest_reading(db, habitat["cool_temp_sensor_id"])
-    humidity_reading = _get_latest_reading(db, habitat["humidity_sensor_id"])
+    requirements = habitat.get("requirements")
+    basking_reading = habitat.get("basking")
+    cool_reading = habitat.get("cool")
+    humidity_reading = habitat.get("humidity")
 
-    # Get outlet states
-    outlets = {}
-    for outlet_key in ["heat_lamp_outlet_id", "ceramic_heater_outlet_id", "uvb_outlet_id", "humidifier_outlet_id"]:
-        outlet_id = habitat.get(outlet_key)
-        if outlet_id:
-            state = db.outlet_states.find_one({"outlet_id": outlet_id})
-            outlets[outlet_key.replace("_outlet_id", "")] = state["state"] if state else "unknown"
+    states = {o["outlet_id"]: o.get("state") for o in habitat["outlet_states"]}
+    outlets = {
+        key.replace("_outlet_id", ""): states.get(habitat[key]) or "unknown"
+        for key in OUTLET_KEYS if habitat.get(key)
+    }
 
     # Determine status for each sensor
     basking_status = _check_threshold(
@@ -212,7 +217,7 @@ def get_habitat_status(habitat_id: str, db: Database = Depends(get_db)):
     return HabitatStatusResponse(
         habitat_id=habitat_id,
         name=habitat["name"],
-        species=ReptileSpecies(habitat["species"]),
+        species=_SPECIES[habitat["species"]],
         current_conditions=CurrentConditions(
             basking_temp=basking_reading,
             cool_temp=cool_reading,
@@ -234,13 +239,22 @@ def get_habitat_status(habitat_id: str, db: Database = Depends(get_db)):
 
 
 @router.get("/{habitat_id}/readings", response_model=SensorReadingsListResponse)
-def get_habitat_readings(
+async def get_habitat_readings(
     habitat_id: str,
     hours: int = 24,
-    db: Database = Depends(get_db)
+    downsample: bool = False,
+    accept: Optional[str] = Header(default=None),
+    db: AsyncDatabase = Depends(get_read_db)
 ):
-    """Get all sensor readings for a habitat within a time range."""
-    habitat = db.habitats.find_one({"habitat_id": habitat_id})
+    """
+    Get all sensor readings for a habitat within a time range.
+
+    With downsample=true, returns one averaged reading per sensor per minute
+    from the rollup; invalid readings are left out of the averages. Send
+    `Accept: application/x-ndjson` to stream one reading per line instead
+    of a JSON document.
+    """
+    habitat = await db.habitats.find_one({"habitat_id": habitat_id}, _SENSOR_ID_PROJECTION)
     if not habitat:
         raise HTTPException(status_code=404, detail="Habitat not found")
 
@@ -253,36 +267,120 @@ def get_habitat_readings(
         habitat["humidity_sensor_id"]
     ]
 
-    readings = list(db.sensor_readings.find({
-        "sensor_id": {"$in": sensor_ids},
-        "timestamp": {"$gte": start_time, "$lte": end_time}
-    }).sort("timestamp", 1))
-
-    return SensorReadingsListResponse(
-        sensor_id=habitat_id,
-        readings=[
-            SensorReadingResponse(
-                value=r["value"],
-                timestamp=r["timestamp"],
-                unit=SensorUnit(r["unit"]),
-                is_valid=r.get("is_valid", True)
-            )
-            for r in readings
-        ],
-        count=len(readings)
+    # Downsampled windows come from the per-minute rollup rather than raw readings
+    collection = db[ROLLUP_COLLECTION] if downsample else db.sensor_readings
+    cursor = collection.find(
+        {
+            "sensor_id": {"$in": sensor_ids},
+            "timestamp": {"$gte": start_time, "$lte": end_time}
+        },
+        _READING_PROJECTION
+    ).sort("timestamp", 1).batch_size(READINGS_BATCH_SIZE)
+
+    if accept and NDJSON_MEDIA_TYPE in accept:
+        return StreamingResponse(_stream_readings_ndjson(cursor), media_type=NDJSON_MEDIA_TYPE)
+
+    # Serialize straight from the cursor; response_model is kept for the docs
+    readings = [_reading_to_dict(r) async for r in cursor]
+    return Response(
+        content=orjson.dumps({"sensor_id": habitat_id, "readings": readings, "count": len(readings)}),
+        media_type="application/json"
     )
 
 
+def _reading_to_dict(doc: dict) -> dict:
+    """Convert a projected reading document to a SensorReadingResponse-shaped dict."""
+    return {
+        "value": doc["value"],
+        "timestamp": doc["timestamp"],
+        "unit": doc["unit"],
+        "is_valid": doc.get("is_valid", True)
+    }
+
+
+async def _stream_readings_ndjson(cursor) -> AsyncGenerator[bytes, None]:
+    """Yield readings from a cursor as newline-delimited JSON."""
+    async for r in cursor:
+        yield orjson.dumps(_reading_to_dict(r)) + b"\n"
+
+
+def _sensor_ids(doc: dict) -> list[str]:
+    """The sensor ids a habitat document names, skipping unset ones."""
+    return [
+        sensor_id for sensor_id in (
+            doc.get("basking_temp_sensor_id"),
+            doc.get("cool_temp_sensor_id"),
+            doc.get("humidity_sensor_id")
+        )
+        if sensor_id
+    ]
+
+
+async def _tag_thresholds(db: AsyncDatabase, habitat_id: str, sensor_ids: list[str]):
+    """Point each threshold's habitat_id at the habitat that now names its sensor."""
+    await db.thresholds.update_many(
+        {"habitat_id": habitat_id, "sensor_id": {"$nin": sensor_ids}},
+        {"$unset": {"habitat_id": ""}}
+    )
+    if sensor_ids:
+        await db.thresholds.update_many(
+            {"sensor_id": {"$in": sensor_ids}},
+            {"$set": {"habitat_id": habitat_id}}
+        )
+
+
+def _habitat_to_doc(habitat: HabitatCreate, habitat_id: str) -> dict:
+    """Build the MongoDB document for a habitat, with embedded hardware config."""
+    power_strip = habitat.power_strip
+    power_strip_doc = None
+    if power_strip:
+        power_strip_doc = {
+            "strip_id": power_strip.strip_id,
+            "ip": power_strip.ip,
+            "username": power_strip.username,
+            "password": power_strip.password,
+            "outlets": [
+                {"outlet_id": o.outlet_id, "plug_number": o.plug_number}
+                for o in power_strip.outlets
+            ]
+        }
+
+    sensor_config = habitat.sensor_config
+    outlet_config = habitat.outlet_config
+    return {
+        "habitat_id": habitat_id,
+        "name": habitat.name,
+        "species": habitat.species.value,
+        "sensors": [
+            {
+                "sensor_id": s.sensor_id,
+                "ble_address": s.ble_address,
+                "location": s.location.value,
+                "device_type": s.device_type
+            }
+            for s in habitat.sensors or ()
+        ],
+        "power_strip": power_strip_doc,
+        "basking_temp_sensor_id": sensor_config.basking_temp,
+        "cool_temp_sensor_id": sensor_config.cool_temp,
+        "humidity_sensor_id": sensor_config.humidity,
+        "heat_lamp_outlet_id": outlet_config.heat_lamp,
+        "ceramic_heater_outlet_id": outlet_config.ceramic_heater,
+        "uvb_outlet_id": outlet_config.uvb,
+        "humidifier_outlet_id": outlet_config.humidifier
+    }
+
+
 def _doc_to_response(doc: dict) -> HabitatResponse:
-    """Convert MongoDB document to response model."""
+    """Convert MongoDB document to response model (DB data is trusted, so skip validation)."""
     # Parse embedded sensors
     sensors = None
     if doc.get("sensors"):
         sensors = [
-            SensorHardwareConfig(
+            SensorHardwareConfig.model_construct(
                 sensor_id=s["sensor_id"],
                 ble_address=s["ble_address"],
-                location=SensorLocation(s["location"]),
+                location=_LOCATIONS[s["location"]],
                 device_type=s.get("device_type", "LYWSD03MMC")
             )
             for s in doc["sensors"]
@@ -293,13 +391,13 @@ def _doc_to_response(doc: dict) -> HabitatResponse:
     if doc.get("power_strip"):
         ps = doc["power_strip"]
         outlets = [
-            OutletHardwareConfig(
+            OutletHardwareConfig.model_construct(
                 outlet_id=o["outlet_id"],
                 plug_number=o["plug_number"]
             )
             for o in ps.get("outlets", [])
         ]
-        power_strip = PowerStripConfig(
+        power_strip = PowerStripConfig.model_construct(
             strip_id=ps["strip_id"],
             ip=ps["ip"],
             username=ps["username"],
@@ -307,10 +405,10 @@ def _doc_to_response(doc: dict) -> HabitatResponse:
             outlets=outlets
         )
 
-    return HabitatResponse(
+    return HabitatResponse.model_construct(
         habitat_id=doc["habitat_id"],
         name=doc["name"],
-        species=ReptileSpecies(doc["species"]),
+        species=_SPECIES[doc["species"]],
         basking_temp_sensor_id=doc.get("basking_temp_sensor_id", ""),
         cool_temp_sensor_id=doc.get("cool_temp_sensor_id", ""),
         humidity_sensor_id=doc.get("humidity_sensor_id", ""),
@@ -323,15 +421,6 @@ def _doc_to_response(doc: dict) -> HabitatResponse:
     )
 
 
-def _get_latest_reading(db: Database, sensor_id: str) -> float | None:
-    """Get latest reading value for a sensor."""
-    reading = db.sensor_readings.find_one(
-        {"sensor_id": sensor_id},
-        sort=[("timestamp", -1)]
-    )
-    return reading["value"] if reading else None
-
-
 def _check_threshold(value: float | None, min_val: float | None, max_val: float | None) -> ThresholdStatus:
     """Check if value is within threshold."""
     if value is None or min_val is None or max_val is None:
@@ -4,13 +4,15 @@
 Outlet control endpoints for the Reptilia API.
 """
 
+import asyncio
 from datetime import datetime, timedelta, timezone
 from typing import Optional
 from uuid import uuid4
-from fastapi import APIRouter, Depends,  Query
-from pymongo.database import Database
+import orjson
+from fastapi import APIRouter, Depends,  Query, Response
+from pymongo.asynchronous.database import AsyncDatabase
 
-from api.database import get_db
+from api.database import get_db, get_read_db
 from api.models.schemas import (
     OutletStatusResponse,
     OutletControlRequest,
@@ -18,18 +20,63 @@ from api.models.schemas import (
     OutletHistoryResponse,
     RuleInfo
 )
-from api.models.enums import OutletState, ControlMode
+from api.models.enums import OutletState, ControlMode, members_by_value
 
 router = APIRouter(prefix="/outlets", tags=["Outlets"])
 
+_OUTLET_STATES = members_by_value(OutletState)
+_CONTROL_MODES = members_by_value(ControlMode)
+
+# Fields needed to build an OutletCommandResponse
+_COMMAND_PROJECTION = {
+    "_id": 0,
+    "command_id": 1,
+    "desired_state": 1,
+    "reason": 1,
+    "triggered_by_sensor": 1,
+    "triggered_by_user": 1,
+    "timestamp": 1,
+    "executed": 1,
+    "execution_result": 1
+}
+
+# Rule fields needed to build a RuleInfo
+_RULE_INFO_PROJECTION = {
+    "_id": 0,
+    "rule_id": 1,
+    "name": 1,
+    "sensor_id": 1,
+    "enabled": 1,
+    "trigger_operator": 1,
+    "trigger_value": 1,
+}
+
 
 @router.get("/{outlet_id}/status", response_model=OutletStatusResponse)
-def get_outlet_status(outlet_id: str, db: Database = Depends(get_db)):
+async def get_outlet_status(outlet_id: str, db: AsyncDatabase = Depends(get_db)):
     """Get current status of an outlet."""
-    state = db.outlet_states.find_one({"outlet_id": outlet_id})
+    # State and its automation rules in one round-trip
+    cursor = await db.outlet_states.aggregate([
+        {"$match": {"outlet_id": outlet_id}},
+        {"$limit": 1},
+        {"$lookup": {
+            "from": "automation_rules",
+            "localField": "outlet_id",
+            "foreignField": "outlet_id",
+            "pipeline": [{"$project": _RULE_INFO_PROJECTION}],
+            "as": "rules",
+        }},
+    ], allowDiskUse=False)
+    state = next(iter(await cursor.to_list(length=1)), None)
+
+    if state:
+        rules = state["rules"]
+    else:
+        # No state recorded yet; rules may still exist for the outlet
+        rules = await db.automation_rules.find(
+            {"outlet_id": outlet_id}, _RULE_INFO_PROJECTION
+        ).to_list(length=None)
 
-    # Get rules associated with this outlet
-    rules = list(db.automation_rules.find({"outlet_id": outlet_id}))
     rule_infos = [
         RuleInfo(
             rule_id=r["rule_id"],
@@ -50,19 +97,19 @@ def get_outlet_status(outlet_id: str, db: Database = Depends(get_db)):
 
     return OutletStatusResponse(
         outlet_id=outlet_id,
-        state=OutletState(state["state"]),
+        state=_OUTLET_STATES[state["state"]],
         last_changed=state.get("last_changed"),
-        mode=ControlMode(state.get("mode", "automatic")),
+        mode=_CONTROL_MODES[state.get("mode", "automatic")],
         power_watts=state.get("power_watts"),
         rules=rule_infos
     )
 
 
 @router.post("/{outlet_id}/control", response_model=OutletCommandResponse)
-def control_outlet(
+async def control_outlet(
     outlet_id: str,
     request: OutletControlRequest,
-    db: Database = Depends(get_db)
+    db: AsyncDatabase = Depends(get_db)
 ):
     """Manually control an outlet (override automation)."""
     now = datetime.now(timezone.utc)
@@ -80,18 +127,20 @@ def control_outlet(
         "executed": True,  # Assume immediate execution
         "execution_result": "success"
     }
-    db.outlet_commands.insert_one(command)
 
-    # Update outlet state
-    db.outlet_states.update_one(
-        {"outlet_id": outlet_id},
-        {"$set": {
-            "outlet_id": outlet_id,
-            "state": request.state.value,
-            "last_changed": now,
-            "mode": ControlMode.MANUAL.value
-        }},
-        upsert=True
+    # The command record and the state update are independent; issue both at
+    # once. An upsert copies outlet_id from the filter, so it isn't $set.
+    await asyncio.gather(
+        db.outlet_commands.insert_one(command),
+        db.outlet_states.update_one(
+            {"outlet_id": outlet_id},
+            {"$set": {
+                "state": request.state.value,
+                "last_changed": now,
+                "mode": ControlMode.MANUAL.value
+            }},
+            upsert=True
+        )
     )
 
     return OutletCommandResponse(
@@ -106,12 +155,12 @@ def control_outlet(
 
 
 @router.get("/{outlet_id}/history", response_model=OutletHistoryResponse)
-def get_outlet_history(
+async def get_outlet_history(
     outlet_id: str,
     start_time: Optional[datetime] = None,
     end_time: Optional[datetime] = None,
     hours: int = Query(default=24, ge=1, le=720),
-    db: Database = Depends(get_db)
+    db: AsyncDatabase = Depends(get_read_db)
 ):
     """Get command history for an outlet."""
     # Use explicit times if provided, otherwise use hours
@@ -122,24 +171,29 @@ def get_outlet_history(
         query_end = datetime.now(timezone.utc)
         query_start = query_end - timedelta(hours=hours)
 
-    commands = list(db.outlet_commands.find({
-        "outlet_id": outlet_id,
-        "timestamp": {"$gte": query_start, "$lte": query_end}
-    }).sort("timestamp", -1))
-
-    return OutletHistoryResponse(
-        outlet_id=outlet_id,
-        commands=[
-            OutletCommandResponse(
-                command_id=c["command_id"],
-                desired_state=OutletState(c["desired_state"]),
-                reason=c["reason"],
-                triggered_by_sensor=c.get("triggered_by_sensor"),
-                triggered_by_user=c.get("triggered_by_user"),
-                timestamp=c["timestamp"],
-                executed=c.get("executed", False),
-                execution_result=c.get("execution_result")
-            )
-            for c in commands
-        ]
+    cursor = db.outlet_commands.find(
+        {
+            "outlet_id": outlet_id,
+            "timestamp": {"$gte": query_start, "$lte": query_end}
+        },
+        _COMMAND_PROJECTION
+    ).sort("timestamp", -1)
+
+    # Serialize straight from the cursor; response_model is kept for the docs
+    commands = [
+        {
+            "command_id": c["command_id"],
+            "desired_state": c["desired_state"],
+            "reason": c["reason"],
+            "triggered_by_sensor": c.get("triggered_by_sensor"),
+            "triggered_by_user": c.get("triggered_by_user"),
+            "timestamp": c["timestamp"],
+            "executed": c.get("executed", False),
+            "execution_result": c.get("execution_result")
+        }
+        async for c in cursor
+    ]
+    return Response(
+        content=orjson.dumps({"outlet_id": outlet_id, "commands": commands}),
+        media_type="application/json"
     )
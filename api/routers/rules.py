@@ -4,40 +4,55 @@
 Automation rules endpoints for the Reptilia API.
 """
 
-from fastapi import APIRouter, Depends, HTTPException
-from pymongo.database import Database
+from typing import Optional
 
-from api.database import get_db
+from fastapi import APIRouter, Depends, HTTPException, Query
+from pymongo import ReturnDocument
+from pymongo.asynchronous.database import AsyncDatabase
+
+from api.database import get_db, get_read_db
 from api.models.schemas import (
     AutomationRuleResponse,
     AutomationRuleCreate,
     AutomationRuleUpdate
 )
-from api.models.enums import OutletState, TriggerOperator
+from api.models.enums import OutletState, TriggerOperator, members_by_value
 
 router = APIRouter(prefix="/rules", tags=["Automation Rules"])
 
+_TRIGGER_OPERATORS = members_by_value(TriggerOperator)
+_OUTLET_STATES = members_by_value(OutletState)
+
 
 @router.get("", response_model=list[AutomationRuleResponse])
-def list_rules(db: Database = Depends(get_db)):
-    """List all registered automation rules."""
-    rules = list(db.automation_rules.find({}))
-    return [_doc_to_response(r) for r in rules]
+async def list_rules(
+    limit: int = Query(default=100, ge=1, le=1000),
+    after: Optional[str] = None,
+    db: AsyncDatabase = Depends(get_read_db)
+):
+    """
+    List registered automation rules, ordered by rule_id.
+
+    Pass the last rule_id of a page as `after` to fetch the next one.
+    """
+    query = {"rule_id": {"$gt": after}} if after else {}
+    cursor = db.automation_rules.find(query).sort("rule_id", 1).limit(limit)
+    return [_doc_to_response(r) async for r in cursor]
 
 
 @router.get("/{rule_id}", response_model=AutomationRuleResponse)
-def get_rule(rule_id: str, db: Database = Depends(get_db)):
+async def get_rule(rule_id: str, db: AsyncDatabase = Depends(get_db)):
     """Get a specific automation rule."""
-    rule = db.automation_rules.find_one({"rule_id": rule_id})
+    rule = await db.automation_rules.find_one({"rule_id": rule_id})
     if not rule:
         raise HTTPException(status_code=404, detail="Rule not found")
     return _doc_to_response(rule)
 
 
 @router.post("", response_model=AutomationRuleResponse, status_code=201)
-def create_rule(rule: AutomationRuleCreate, db: Database = Depends(get_db)):
+async def create_rule(rule: AutomationRuleCreate, db: AsyncDatabase = Depends(get_db)):
     """Create a custom automation rule."""
-    existing = db.automation_rules.find_one({"rule_id": rule.rule_id})
+    existing = await db.automation_rules.find_one({"rule_id": rule.rule_id})
     if existing:
         raise HTTPException(status_code=409, detail="Rule already exists")
 
@@ -57,21 +72,17 @@ def create_rule(rule: AutomationRuleCreate, db: Database = Depends(get_db)):
         "last_triggered": None
     }
 
-    db.automation_rules.insert_one(doc)
+    await db.automation_rules.insert_one(doc)
     return _doc_to_response(doc)
 
 
 @router.put("/{rule_id}", response_model=AutomationRuleResponse)
-def update_rule(
+async def update_rule(
     rule_id: str,
     update: AutomationRuleUpdate,
-    db: Database = Depends(get_db)
+    db: AsyncDatabase = Depends(get_db)
 ):
     """Update an automation rule."""
-    existing = db.automation_rules.find_one({"rule_id": rule_id})
-    if not existing:
-        raise HTTPException(status_code=404, detail="Rule not found")
-
     # Build update document with only provided fields
     update_doc = {}
     if update.name is not None:
@@ -91,61 +102,56 @@ def update_rule(
     if update.enabled is not None:
         update_doc["enabled"] = update.enabled
 
-    if update_doc:
-        db.automation_rules.update_one({"rule_id": rule_id}, {"$set": update_doc})
-
-    updated = db.automation_rules.find_one({"rule_id": rule_id})
-    return _doc_to_response(updated)
+    return await _set_rule_fields(db, rule_id, update_doc)
 
 
 @router.delete("/{rule_id}", status_code=204)
-def delete_rule(rule_id: str, db: Database = Depends(get_db)):
+async def delete_rule(rule_id: str, db: AsyncDatabase = Depends(get_db)):
     """Delete an automation rule."""
-    result = db.automation_rules.delete_one({"rule_id": rule_id})
+    result = await db.automation_rules.delete_one({"rule_id": rule_id})
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Rule not found")
 
 
 @router.post("/{rule_id}/enable", response_model=AutomationRuleResponse)
-def enable_rule(rule_id: str, db: Database = Depends(get_db)):
+async def enable_rule(rule_id: str, db: AsyncDatabase = Depends(get_db)):
     """Enable a disabled rule."""
-    result = db.automation_rules.update_one(
-        {"rule_id": rule_id},
-        {"$set": {"enabled": True}}
-    )
-    if result.matched_count == 0:
-        raise HTTPException(status_code=404, detail="Rule not found")
-
-    rule = db.automation_rules.find_one({"rule_id": rule_id})
-    return _doc_to_response(rule)
+    return await _set_rule_fields(db, rule_id, {"enabled": True})
 
 
 @router.post("/{rule_id}/disable", response_model=AutomationRuleResponse)
-def disable_rule(rule_id: str, db: Database = Depends(get_db)):
+async def disable_rule(rule_id: str, db: AsyncDatabase = Depends(get_db)):
     """Temporarily disable a rule."""
-    result = db.automation_rules.update_one(
-        {"rule_id": rule_id},
-        {"$set": {"enabled": False}}
-    )
-    if result.matched_count == 0:
+    return await _set_rule_fields(db, rule_id, {"enabled": False})
+
+
+async def _set_rule_fields(db: AsyncDatabase, rule_id: str, fields: dict) -> AutomationRuleResponse:
+    """Set fields on a rule and return it as updated, in one round-trip (404 if missing)."""
+    if fields:
+        rule = await db.automation_rules.find_one_and_update(
+            {"rule_id": rule_id},
+            {"$set": fields},
+            return_document=ReturnDocument.AFTER
+        )
+    else:
+        rule = await db.automation_rules.find_one({"rule_id": rule_id})
+    if not rule:
         raise HTTPException(status_code=404, detail="Rule not found")
-
-    rule = db.automation_rules.find_one({"rule_id": rule_id})
     return _doc_to_response(rule)
 
 
 def _doc_to_response(doc: dict) -> AutomationRuleResponse:
-    """Convert MongoDB document to response model."""
-    return AutomationRuleResponse(
+    """Convert MongoDB document to response model (DB data is trusted, so skip validation)."""
+    return AutomationRuleResponse.model_construct(
         rule_id=doc["rule_id"],
         name=doc["name"],
         habitat_id=doc["habitat_id"],
         sensor_id=doc["sensor_id"],
         outlet_id=doc["outlet_id"],
         trigger_value=doc["trigger_value"],
-        trigger_operator=TriggerOperator(doc["trigger_operator"]),
-        action_on_trigger=OutletState(doc["action_on_trigger"]),
-        action_on_clear=OutletState(doc["action_on_clear"]) if doc.get("action_on_clear") else None,
+        trigger_operator=_TRIGGER_OPERATORS[doc["trigger_operator"]],
+        action_on_trigger=_OUTLET_STATES[doc["action_on_trigger"]],
+        action_on_clear=_OUTLET_STATES[doc["action_on_clear"]] if doc.get("action_on_clear") else None,
         min_duration_seconds=doc.get("min_duration_seconds", 300),
         hysteresis=doc.get("hysteresis", 2.0),
         enabled=doc.get("enabled", True),
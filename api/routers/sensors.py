@@ -6,32 +6,41 @@ Sensor endpoints for the Reptilia API.
 
 from datetime import datetime, timedelta, timezone
 from typing import Optional
-from fastapi import APIRouter, Depends,  Query
-from pymongo.database import Database
+import orjson
+from fastapi import APIRouter, Depends,  Query, Response
+from pymongo.asynchronous.database import AsyncDatabase
 
-from api.database import get_db
+from api.database import get_db, get_read_db, index_hint
 from api.models.schemas import (
     SensorStatusResponse,
     SensorReadingsListResponse,
-    SensorReadingResponse,
     SensorReadingCreate,
     ThresholdInfo
 )
-from api.models.enums import SensorStatus, SensorUnit, ThresholdStatus
+from api.models.enums import SensorStatus, ThresholdStatus
 
 router = APIRouter(prefix="/sensors", tags=["Sensors"])
 
 # Readings older than this are considered stale
 STALE_THRESHOLD_MINUTES = 10
+STALE_AFTER = timedelta(minutes=STALE_THRESHOLD_MINUTES)
+
+# Readings fetched per cursor batch: fewer round-trips without holding a whole window
+READINGS_BATCH_SIZE = 1000
+
+# Fields needed to build a SensorReadingResponse
+_READING_PROJECTION = {"_id": 0, "value": 1, "timestamp": 1, "unit": 1, "is_valid": 1}
 
 
 @router.get("/{sensor_id}/status", response_model=SensorStatusResponse)
-def get_sensor_status(sensor_id: str, db: Database = Depends(get_db)):
+async def get_sensor_status(sensor_id: str, db: AsyncDatabase = Depends(get_db)):
     """Get current status of a sensor."""
-    # Get latest reading
-    latest = db.sensor_readings.find_one(
+    # Get latest reading (newest entry on sensor_timestamp_idx, only the fields used)
+    latest = await db.sensor_readings.find_one(
         {"sensor_id": sensor_id},
-        sort=[("timestamp", -1)]
+        {"_id": 0, "value": 1, "timestamp": 1, "is_valid": 1},
+        sort=[("timestamp", -1)],
+        **index_hint("sensor_readings", "sensor_timestamp_idx")
     )
 
     if not latest:
@@ -44,16 +53,14 @@ def get_sensor_status(sensor_id: str, db: Database = Depends(get_db)):
         )
 
     # Check if stale
-    now = datetime.now(timezone.utc)
-    reading_time = latest["timestamp"]
-    if reading_time.tzinfo is None:
-        reading_time = reading_time.replace(tzinfo=timezone.utc)
-
-    is_stale = (now - reading_time) > timedelta(minutes=STALE_THRESHOLD_MINUTES)
+    is_stale = datetime.now(timezone.utc) - latest["timestamp"] > STALE_AFTER
     status = SensorStatus.STALE if is_stale else SensorStatus.ACTIVE
 
     # Get threshold for this sensor
-    threshold = db.thresholds.find_one({"sensor_id": sensor_id})
+    threshold = await db.thresholds.find_one(
+        {"sensor_id": sensor_id},
+        {"_id": 0, "min_value": 1, "max_value": 1, "zone_type": 1}
+    )
     threshold_info = None
     threshold_status = ThresholdStatus.UNKNOWN
 
@@ -84,12 +91,12 @@ def get_sensor_status(sensor_id: str, db: Database = Depends(get_db)):
 
 
 @router.get("/{sensor_id}/readings", response_model=SensorReadingsListResponse)
-def get_sensor_readings(
+async def get_sensor_readings(
     sensor_id: str,
     hours: int = Query(default=24, ge=1, le=720),
     start_time: Optional[datetime] = None,
     end_time: Optional[datetime] = None,
-    db: Database = Depends(get_db)
+    db: AsyncDatabase = Depends(get_read_db)
 ):
     """Get historical readings for a sensor."""
     # Use explicit times if provided, otherwise use hours
@@ -100,31 +107,35 @@ def get_sensor_readings(
         query_end = datetime.now(timezone.utc)
         query_start = query_end - timedelta(hours=hours)
 
-    readings = list(db.sensor_readings.find({
-        "sensor_id": sensor_id,
-        "timestamp": {"$gte": query_start, "$lte": query_end}
-    }).sort("timestamp", 1))
-
-    return SensorReadingsListResponse(
-        sensor_id=sensor_id,
-        readings=[
-            SensorReadingResponse(
-                value=r["value"],
-                timestamp=r["timestamp"],
-                unit=SensorUnit(r["unit"]),
-                is_valid=r.get("is_valid", True)
-            )
-            for r in readings
-        ],
-        count=len(readings)
+    cursor = db.sensor_readings.find(
+        {
+            "sensor_id": sensor_id,
+            "timestamp": {"$gte": query_start, "$lte": query_end}
+        },
+        _READING_PROJECTION
+    ).sort("timestamp", 1).batch_size(READINGS_BATCH_SIZE)
+
+    # Serialize straight from the cursor; response_model is kept for the docs
+    readings = [
+        {
+            "value": r["value"],
+            "timestamp": r["timestamp"],
+            "unit": r["unit"],
+            "is_valid": r.get("is_valid", True)
+        }
+        async for r in cursor
+    ]
+    return Response(
+        content=orjson.dumps({"sensor_id": sensor_id, "readings": readings, "count": len(readings)}),
+        media_type="application/json"
     )
 
 
 @router.post("/{sensor_id}/readings", status_code=201)
-def submit_sensor_reading(
+async def submit_sensor_reading(
     sensor_id: str,
     reading: SensorReadingCreate,
-    db: Database = Depends(get_db)
+    db: AsyncDatabase = Depends(get_db)
 ):
     """Submit a new sensor reading (for external sensor integrations)."""
     # Map unit string to enum value
@@ -143,6 +154,6 @@ def submit_sensor_reading(
         "is_valid": True
     }
 
-    db.sensor_readings.insert_one(doc)
+    await db.sensor_readings.insert_one(doc)
 
     return {"status": "created", "sensor_id": sensor_id, "value": reading.value}
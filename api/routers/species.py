@@ -4,36 +4,50 @@
 Species requirements endpoints for the Reptilia API.
 """
 
-from fastapi import APIRouter, Depends, HTTPException
-from pymongo.database import Database
+from typing import Optional
 
-from api.database import get_db
+from fastapi import APIRouter, Depends, HTTPException, Query
+from pymongo.asynchronous.database import AsyncDatabase
+
+from api.cache import get_requirements
+from api.database import get_read_db
 from api.models.schemas import SpeciesRequirementsResponse
-from api.models.enums import ReptileSpecies
+from api.models.enums import ReptileSpecies, members_by_value
 
 router = APIRouter(prefix="/species", tags=["Species"])
 
+_SPECIES = members_by_value(ReptileSpecies)
+
 
 @router.get("", response_model=list[SpeciesRequirementsResponse])
-def list_species(db: Database = Depends(get_db)):
-    """List all supported species and their requirements."""
-    species = list(db.habitat_requirements.find({}))
-    return [_doc_to_response(s) for s in species]
+async def list_species(
+    limit: int = Query(default=100, ge=1, le=1000),
+    after: Optional[str] = None,
+    db: AsyncDatabase = Depends(get_read_db)
+):
+    """
+    List supported species and their requirements, ordered by species.
+
+    Pass the last species of a page as `after` to fetch the next one.
+    """
+    query = {"species": {"$gt": after}} if after else {}
+    cursor = db.habitat_requirements.find(query).sort("species", 1).limit(limit)
+    return [_doc_to_response(s) async for s in cursor]
 
 
 @router.get("/{species}", response_model=SpeciesRequirementsResponse)
-def get_species_requirements(species: ReptileSpecies, db: Database = Depends(get_db)):
+async def get_species_requirements(species: ReptileSpecies, db: AsyncDatabase = Depends(get_read_db)):
     """Get requirements for a specific species."""
-    requirements = db.habitat_requirements.find_one({"species": species.value})
+    requirements = await get_requirements(db, species.value)
     if not requirements:
         raise HTTPException(status_code=404, detail=f"Species {species.value} not found")
     return _doc_to_response(requirements)
 
 
 def _doc_to_response(doc: dict) -> SpeciesRequirementsResponse:
-    """Convert MongoDB document to response model."""
-    return SpeciesRequirementsResponse(
-        species=ReptileSpecies(doc["species"]),
+    """Convert MongoDB document to response model (DB data is trusted, so skip validation)."""
+    return SpeciesRequirementsResponse.model_construct(
+        species=_SPECIES[doc["species"]],
         basking_temp_min=doc["basking_temp_min"],
         basking_temp_max=doc["basking_temp_max"],
         cool_side_temp_min=doc["cool_side_temp_min"],
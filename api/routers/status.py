@@ -4,12 +4,15 @@
 System status endpoints for the Reptilia API.
 """
 
+import asyncio
 import time
 from datetime import datetime, timedelta, timezone
 from fastapi import APIRouter, Depends
-from pymongo.database import Database
+from pymongo.asynchronous.database import AsyncDatabase
 
-from api.database import get_db
+from api.cache import TTLCache
+from api.database import get_db, index_hint, is_db_healthy
+from api.pipelines import latest_reading_lookup
 from api.models.schemas import (
     SystemStatusResponse,
     DatabaseStatusResponse,
@@ -27,99 +30,106 @@ _startup_time = time.time()
 # Readings older than this are considered stale
 STALE_THRESHOLD_MINUTES = 10
 
+# Status polls within this window are served from memory
+STATUS_CACHE_SECONDS = 3.0
+_status_cache = TTLCache(ttl=STATUS_CACHE_SECONDS, maxsize=1)
+_status_inflight: asyncio.Future | None = None
+
+# Habitats whose latest reading on any sensor is outside that sensor's
+# threshold, counted in one pass: one row per habitat sensor, joined to its
+# newest reading and threshold
+OUT_OF_RANGE_PIPELINE = [
+    {"$project": {"sensor_id": [
+        "$basking_temp_sensor_id", "$cool_temp_sensor_id", "$humidity_sensor_id"
+    ]}},
+    {"$unwind": "$sensor_id"},
+    {"$match": {"sensor_id": {"$type": "string", "$ne": ""}}},
+    latest_reading_lookup("sensor_id", "reading"),
+    {"$lookup": {
+        "from": "thresholds",
+        "localField": "sensor_id",
+        "foreignField": "sensor_id",
+        "pipeline": [{"$project": {"_id": 0, "min_value": 1, "max_value": 1}}],
+        "as": "threshold",
+    }},
+    {"$set": {
+        "value": {"$first": "$reading.value"},
+        "min_value": {"$first": "$threshold.min_value"},
+        "max_value": {"$first": "$threshold.max_value"},
+    }},
+    # Sensors with no reading or no threshold can't be out of range
+    {"$match": {
+        "value": {"$type": "number"},
+        "min_value": {"$type": "number"},
+        "max_value": {"$type": "number"},
+        "$expr": {"$or": [
+            {"$lt": ["$value", "$min_value"]},
+            {"$gt": ["$value", "$max_value"]},
+        ]},
+    }},
+    {"$group": {"_id": "$_id"}},
+    {"$count": "out_of_range"},
+]
+
 
 @router.get("", response_model=SystemStatusResponse)
-def get_system_status(db: Database = Depends(get_db)):
+async def get_system_status(db: AsyncDatabase = Depends(get_db)):
     """Get overall system health status."""
-    now = datetime.now(timezone.utc)
-    stale_cutoff = now - timedelta(minutes=STALE_THRESHOLD_MINUTES)
-
-    # Check database connectivity
-    try:
-        db.command("ping")
-        db_status = "connected"
-    except Exception:
-        db_status = "disconnected"
-
-    # Get sensor stats
-    all_sensors = set()
-    active_sensors = set()
-    stale_sensors = set()
+    global _status_inflight
+    cached = _status_cache.get("status")
+    if cached is not None:
+        return cached
+
+    # Single-flight: concurrent pollers share one in-progress build
+    if _status_inflight is None:
+        _status_inflight = asyncio.ensure_future(_build_system_status(db))
+        _status_inflight.add_done_callback(_store_system_status)
+    # Shielded so one client disconnecting doesn't cancel the shared build
+    return await asyncio.shield(_status_inflight)
+
+
+def _store_system_status(task: asyncio.Future) -> None:
+    """Cache a finished status build and clear the in-flight slot."""
+    global _status_inflight
+    _status_inflight = None
+    if task.cancelled() or task.exception() is not None:
+        return
+    status = task.result()
+    # A disconnected report costs no queries to rebuild, and caching it would
+    # keep serving it for STATUS_CACHE_SECONDS after the probe recovers
+    if status.database != "disconnected":
+        _status_cache.set("status", status)
+
+
+async def _build_system_status(db: AsyncDatabase) -> SystemStatusResponse:
+    """Query connectivity, sensor, outlet and habitat stats and assemble the response."""
+    # The last ping (startup or background probe, see is_db_healthy) already
+    # knows the database is down; report that without waiting on the stats
+    # queries to time out
+    if not is_db_healthy():
+        return SystemStatusResponse(
+            status=SystemHealth.UNHEALTHY,
+            database="disconnected",
+            sensors=SensorStats(total=0, active=0, stale=0),
+            outlets=OutletStats(total=0, responsive=0, errors=0),
+            habitats=HabitatStats(total=0, in_range=0, out_of_range=0),
+            uptime_seconds=int(time.time() - _startup_time)
+        )
 
-    # Get unique sensor IDs from recent readings
-    recent_readings = db.sensor_readings.find(
-        {"timestamp": {"$gte": stale_cutoff}},
-        {"sensor_id": 1}
-    )
-    for r in recent_readings:
-        all_sensors.add(r["sensor_id"])
-        active_sensors.add(r["sensor_id"])
-
-    # Get sensor IDs from older readings (stale)
-    older_readings = db.sensor_readings.find(
-        {"timestamp": {"$lt": stale_cutoff}},
-        {"sensor_id": 1}
-    )
-    for r in older_readings:
-        sensor_id = r["sensor_id"]
-        all_sensors.add(sensor_id)
-        if sensor_id not in active_sensors:
-            stale_sensors.add(sensor_id)
-
-    sensor_stats = SensorStats(
-        total=len(all_sensors),
-        active=len(active_sensors),
-        stale=len(stale_sensors)
-    )
+    stale_cutoff = datetime.now(timezone.utc) - timedelta(minutes=STALE_THRESHOLD_MINUTES)
 
-    # Get outlet stats
-    outlet_states = list(db.outlet_states.find({}))
-    errors = sum(1 for o in outlet_states if o.get("state") == "error")
-    outlet_stats = OutletStats(
-        total=len(outlet_states),
-        responsive=len(outlet_states) - errors,
-        errors=errors
-    )
-
-    # Get habitat stats
-    habitats = list(db.habitats.find({}))
-    out_of_range = 0
-
-    for habitat in habitats:
-        # Check if any sensor is out of range
-        for sensor_key in ["basking_temp_sensor_id", "cool_temp_sensor_id", "humidity_sensor_id"]:
-            sensor_id = habitat.get(sensor_key)
-            if not sensor_id:
-                continue
-
-            # Get latest reading
-            reading = db.sensor_readings.find_one(
-                {"sensor_id": sensor_id},
-                sort=[("timestamp", -1)]
-            )
-            if not reading:
-                continue
-
-            # Get threshold
-            threshold = db.thresholds.find_one({"sensor_id": sensor_id})
-            if not threshold:
-                continue
-
-            value = reading["value"]
-            if value < threshold["min_value"] or value > threshold["max_value"]:
-                out_of_range += 1
-                break  # Count habitat only once
-
-    habitat_stats = HabitatStats(
-        total=len(habitats),
-        in_range=len(habitats) - out_of_range,
-        out_of_range=out_of_range
+    # The checks are independent, so their round-trips overlap
+    db_status, sensor_stats, outlet_stats, habitat_stats = await asyncio.gather(
+        _check_connectivity(db),
+        _sensor_stats(db, stale_cutoff),
+        _outlet_stats(db),
+        _habitat_stats(db)
     )
 
     # Determine overall health
     if db_status == "disconnected":
         health = SystemHealth.UNHEALTHY
-    elif out_of_range > 0 or errors > 0 or len(stale_sensors) > 0:
+    elif habitat_stats.out_of_range > 0 or outlet_stats.errors > 0 or sensor_stats.stale > 0:
         health = SystemHealth.DEGRADED
     else:
         health = SystemHealth.HEALTHY
@@ -136,12 +146,60 @@ def get_system_status(db: Database = Depends(get_db)):
     )
 
 
+async def _check_connectivity(db: AsyncDatabase) -> str:
+    """Ping the database."""
+    try:
+        await db.command("ping")
+        return "connected"
+    except Exception:
+        return "disconnected"
+
+
+async def _sensor_stats(db: AsyncDatabase, stale_cutoff: datetime) -> SensorStats:
+    """Count sensors, classified by their newest reading server-side."""
+    # Sorting on sensor_timestamp_idx's key order lets the first $group use a
+    # DISTINCT_SCAN (one index probe per sensor) instead of reading every row.
+    cursor = await db.sensor_readings.aggregate([
+        {"$sort": {"sensor_id": 1, "timestamp": -1}},
+        {"$group": {"_id": "$sensor_id", "last_ts": {"$first": "$timestamp"}}},
+        {"$group": {
+            "_id": None,
+            "total": {"$sum": 1},
+            "active": {"$sum": {"$cond": [{"$gte": ["$last_ts", stale_cutoff]}, 1, 0]}},
+        }},
+    ], **index_hint("sensor_readings", "sensor_timestamp_idx"))
+    counted = await cursor.to_list(length=1)
+    total = counted[0]["total"] if counted else 0
+    active = counted[0]["active"] if counted else 0
+    return SensorStats(total=total, active=active, stale=total - active)
+
+
+async def _outlet_stats(db: AsyncDatabase) -> OutletStats:
+    """Count outlets (from collection metadata) and those reporting an error."""
+    total, errors = await asyncio.gather(
+        db.outlet_states.estimated_document_count(),
+        db.outlet_states.count_documents({"state": "error"})
+    )
+    return OutletStats(total=total, responsive=total - errors, errors=errors)
+
+
+async def _habitat_stats(db: AsyncDatabase) -> HabitatStats:
+    """Count habitats and those with any sensor outside its threshold."""
+    total, cursor = await asyncio.gather(
+        db.habitats.estimated_document_count(),
+        db.habitats.aggregate(OUT_OF_RANGE_PIPELINE)
+    )
+    counted = await cursor.to_list(length=1)
+    out_of_range = counted[0]["out_of_range"] if counted else 0
+    return HabitatStats(total=total, in_range=total - out_of_range, out_of_range=out_of_range)
+
+
 @router.get("/database", response_model=DatabaseStatusResponse)
-def check_database(db: Database = Depends(get_db)):
+async def check_database(db: AsyncDatabase = Depends(get_db)):
     """Check database connectivity."""
     try:
-        db.command("ping")
-        collections = db.list_collection_names()
+        await db.command("ping")
+        collections = await db.list_collection_names()
         return DatabaseStatusResponse(
             connected=True,
             database=db.name,
@@ -5,31 +5,51 @@ Threshold configuration endpoints for the Reptilia API.
 """
 
 from fastapi import APIRouter, Depends, HTTPException
-from pymongo.database import Database
+from pymongo.asynchronous.database import AsyncDatabase
 
 from api.database import get_db
 from api.models.schemas import ThresholdResponse, ThresholdUpdate
 
 router = APIRouter(prefix="/thresholds", tags=["Thresholds"])
 
+# Fields needed to build a ThresholdResponse
+_THRESHOLD_PROJECTION = {
+    "_id": 0,
+    "sensor_id": 1,
+    "zone_type": 1,
+    "min_value": 1,
+    "max_value": 1,
+    "warning_min": 1,
+    "warning_max": 1,
+    "hysteresis": 1
+}
+
+# Habitat fields naming its sensors
+_SENSOR_ID_PROJECTION = {
+    "_id": 0,
+    "basking_temp_sensor_id": 1,
+    "cool_temp_sensor_id": 1,
+    "humidity_sensor_id": 1
+}
+
 
 @router.get("/{sensor_id}", response_model=ThresholdResponse)
-def get_threshold(sensor_id: str, db: Database = Depends(get_db)):
+async def get_threshold(sensor_id: str, db: AsyncDatabase = Depends(get_db)):
     """Get threshold configuration for a sensor."""
-    threshold = db.thresholds.find_one({"sensor_id": sensor_id})
+    threshold = await db.thresholds.find_one({"sensor_id": sensor_id}, _THRESHOLD_PROJECTION)
     if not threshold:
         raise HTTPException(status_code=404, detail="Threshold not found")
     return _doc_to_response(threshold)
 
 
 @router.put("/{sensor_id}", response_model=ThresholdResponse)
-def update_threshold(
+async def update_threshold(
     sensor_id: str,
     update: ThresholdUpdate,
-    db: Database = Depends(get_db)
+    db: AsyncDatabase = Depends(get_db)
 ):
     """Update threshold configuration (override species defaults)."""
-    existing = db.thresholds.find_one({"sensor_id": sensor_id})
+    existing = await db.thresholds.find_one({"sensor_id": sensor_id})
     if not existing:
         raise HTTPException(status_code=404, detail="Threshold not found")
 
@@ -47,18 +67,17 @@ def update_threshold(
         update_doc["hysteresis"] = update.hysteresis
 
     if update_doc:
-        db.thresholds.update_one({"sensor_id": sensor_id}, {"$set": update_doc})
+        await db.thresholds.update_one({"sensor_id": sensor_id}, {"$set": update_doc})
 
     # Return updated document
-    updated = db.thresholds.find_one({"sensor_id": sensor_id})
+    updated = await db.thresholds.find_one({"sensor_id": sensor_id})
     return _doc_to_response(updated)
 
 
 @router.get("/habitat/{habitat_id}", response_model=list[ThresholdResponse])
-def get_habitat_thresholds(habitat_id: str, db: Database = Depends(get_db)):
+async def get_habitat_thresholds(habitat_id: str, db: AsyncDatabase = Depends(get_db)):
     """Get all thresholds for a habitat."""
-    # Get habitat to find sensor IDs
-    habitat = db.habitats.find_one({"habitat_id": habitat_id})
+    habitat = await db.habitats.find_one({"habitat_id": habitat_id}, _SENSOR_ID_PROJECTION)
     if not habitat:
         raise HTTPException(status_code=404, detail="Habitat not found")
 
@@ -68,8 +87,14 @@ def get_habitat_thresholds(habitat_id: str, db: Database = Depends(get_db)):
         habitat["humidity_sensor_id"]
     ]
 
-    thresholds = list(db.thresholds.find({"sensor_id": {"$in": sensor_ids}}))
-    return [_doc_to_response(t) for t in thresholds]
+    # Tagged thresholds plus any for the habitat's sensors that aren't tagged
+    # yet (written before habitat_id was stored, or saved without one); both
+    # branches are index lookups (habitat_id_idx, sensor_id_idx)
+    cursor = db.thresholds.find(
+        {"$or": [{"habitat_id": habitat_id}, {"sensor_id": {"$in": sensor_ids}}]},
+        _THRESHOLD_PROJECTION
+    )
+    return [_doc_to_response(t) async for t in cursor]
 
 
 def _doc_to_response(doc: dict) -> ThresholdResponse:
@@ -4,12 +4,15 @@
 Mock outlet controller - simulates smart outlets without real hardware.
 """
 
+import logging
 from typing import Dict
 from datetime import datetime, timezone
 
 from domain.ports import OutletController
 from domain.models import OutletState, OutletStateEnum, ControlMode
 
+logger = logging.getLogger(__name__)
+
 
 class MockOutletController(OutletController):
     """
@@ -19,11 +22,11 @@ class MockOutletController(OutletController):
 
     def __init__(self):
         self._states: Dict[str, OutletState] = {}
-        print("🔌 MockOutletController created")
+        logger.debug("🔌 MockOutletController created")
 
     def turn_on(self, outlet_id: str) -> bool:
         """Simulate turning on outlet"""
-        print(f"🔌 ✅ Turning ON outlet: {outlet_id}")
+        logger.debug("🔌 ✅ Turning ON outlet: %s", outlet_id)
 
         self._states[outlet_id] = OutletState(
             outlet_id=outlet_id,
@@ -35,7 +38,7 @@ class MockOutletController(OutletController):
 
     def turn_off(self, outlet_id: str) -> bool:
         """Simulate turning off outlet"""
-        print(f"🔌 ⚫ Turning OFF outlet: {outlet_id}")
+        logger.debug("🔌 ⚫ Turning OFF outlet: %s", outlet_id)
 
         self._states[outlet_id] = OutletState(
             outlet_id=outlet_id,
@@ -5,7 +5,12 @@ Mock repository adapters - store everything in memory (Python lists/dicts).
 No database needed!
 """
 
-from typing import List, Optional, Dict
+import logging
+import os
+from bisect import bisect_left, bisect_right, insort
+from collections import defaultdict
+from types import MappingProxyType
+from typing import List, Mapping, Optional, Dict
 from datetime import datetime
 
 from domain.ports import (
@@ -24,34 +29,65 @@ from domain.models import (
     Threshold
 )
 
+logger = logging.getLogger(__name__)
+
+
+def _timestamp(item) -> datetime:
+    return item.timestamp
+
+
+def _insort_by_time(items: list, item) -> None:
+    """Insert item keeping items sorted by timestamp (appends in the usual in-order case)."""
+    if not items or items[-1].timestamp <= item.timestamp:
+        items.append(item)
+    else:
+        insort(items, item, key=_timestamp)
+
+
+def _time_range(items: list, start_time: datetime, end_time: datetime) -> list:
+    """Slice of timestamp-sorted items with start_time <= timestamp <= end_time."""
+    lo = bisect_left(items, start_time, key=_timestamp)
+    hi = bisect_right(items, end_time, lo=lo, key=_timestamp)
+    return items[lo:hi]
+
 
 class InMemorySensorRepository(SensorRepository):
     """
-    Store sensor readings in memory (Python list).
+    Store sensor readings in memory (time-sorted lists, one per sensor).
     All data is lost when program stops - perfect for testing!
+    Only the newest MOCK_READINGS_MAX readings are kept.
     """
 
     def __init__(self):
-        self._readings: List[SensorReading] = []
-        print("📦 InMemorySensorRepository created")
+        self._max_readings = int(os.getenv("MOCK_READINGS_MAX", "100000"))
+        self._by_sensor: Dict[str, List[SensorReading]] = defaultdict(list)
+        self._all: List[SensorReading] = []
+        logger.debug("📦 InMemorySensorRepository created")
 
     def save_reading(self, reading: SensorReading) -> bool:
-        """Save to list"""
-        self._readings.append(reading)
+        """Save to the sensor's list and the combined list, keeping both time-sorted"""
+        _insort_by_time(self._by_sensor[reading.sensor_id], reading)
+        _insort_by_time(self._all, reading)
+        if len(self._all) > self._max_readings:
+            self._evict_oldest()
         return True
 
-    def get_latest_reading(self, sensor_id: str) -> Optional[SensorReading]:
-        """Get most recent reading for sensor"""
-        sensor_readings = [
-            r for r in self._readings
-            if r.sensor_id == sensor_id
-        ]
-
+    def _evict_oldest(self):
+        """Drop the oldest reading overall, which is also the oldest of its sensor"""
+        oldest = self._all.pop(0)
+        sensor_readings = self._by_sensor[oldest.sensor_id]
+        if sensor_readings[0] is oldest:
+            del sensor_readings[0]
+        else:
+            # Another reading of this sensor shares the timestamp
+            sensor_readings.remove(oldest)
         if not sensor_readings:
-            return None
+            del self._by_sensor[oldest.sensor_id]
 
-        # Return most recent by timestamp
-        return max(sensor_readings, key=lambda r: r.timestamp)
+    def get_latest_reading(self, sensor_id: str) -> Optional[SensorReading]:
+        """Get most recent reading for sensor"""
+        sensor_readings = self._by_sensor.get(sensor_id)
+        return sensor_readings[-1] if sensor_readings else None
 
     def get_readings(
             self,
@@ -60,11 +96,7 @@ class InMemorySensorRepository(SensorRepository):
             end_time: datetime
     ) -> List[SensorReading]:
         """Get readings in time range"""
-        return [
-            r for r in self._readings
-            if r.sensor_id == sensor_id
-               and start_time <= r.timestamp <= end_time
-        ]
+        return _time_range(self._by_sensor.get(sensor_id, []), start_time, end_time)
 
     def get_readings_by_habitat(
             self,
@@ -73,32 +105,37 @@ class InMemorySensorRepository(SensorRepository):
             end_time: datetime
     ) -> List[SensorReading]:
         """Get all readings for habitat (simplified - just return all)"""
-        return [
-            r for r in self._readings
-            if start_time <= r.timestamp <= end_time
-        ]
+        return _time_range(self._all, start_time, end_time)
 
     def clear(self):
         """Clear all data (useful for tests)"""
-        self._readings = []
-        print("🗑️  Sensor readings cleared")
+        self._by_sensor = defaultdict(list)
+        self._all = []
+        logger.debug("🗑️  Sensor readings cleared")
 
     def count(self) -> int:
         """Get total number of readings stored"""
-        return len(self._readings)
+        return len(self._all)
 
 
 class InMemoryOutletRepository(OutletRepository):
-    """Store outlet commands in memory"""
+    """Store outlet commands in memory (time-sorted lists, one per outlet)"""
+
+    # Oldest commands are dropped past this many per outlet, bounding memory
+    # in long-running simulations
+    MAX_COMMANDS_PER_OUTLET = 10_000
 
     def __init__(self):
-        self._commands: List[OutletCommand] = []
+        self._commands: Dict[str, List[OutletCommand]] = defaultdict(list)
         self._states: Dict[str, OutletState] = {}
-        print("📦 InMemoryOutletRepository created")
+        logger.debug("📦 InMemoryOutletRepository created")
 
     def save_command(self, command: OutletCommand) -> bool:
         """Save command to history"""
-        self._commands.append(command)
+        commands = self._commands[command.outlet_id]
+        _insort_by_time(commands, command)
+        if len(commands) > self.MAX_COMMANDS_PER_OUTLET:
+            del commands[:len(commands) - self.MAX_COMMANDS_PER_OUTLET]
         return True
 
     def get_command_history(
@@ -108,11 +145,7 @@ class InMemoryOutletRepository(OutletRepository):
             end_time: datetime
     ) -> List[OutletCommand]:
         """Get command history for outlet"""
-        return [
-            c for c in self._commands
-            if c.outlet_id == outlet_id
-               and start_time <= c.timestamp <= end_time
-        ]
+        return _time_range(self._commands.get(outlet_id, []), start_time, end_time)
 
     def get_current_state(self, outlet_id: str) -> Optional[OutletState]:
         """Get last known state"""
@@ -120,13 +153,75 @@ class InMemoryOutletRepository(OutletRepository):
 
     def save_state(self, state: OutletState):
         """Update current state"""
-        self._states[outlet_id] = state
+        self._states[state.outlet_id] = state
 
     def clear(self):
         """Clear all data"""
-        self._commands = []
+        self._commands = defaultdict(list)
         self._states = {}
-        print("🗑️  Outlet commands cleared")
+        logger.debug("🗑️  Outlet commands cleared")
+
+
+# Species requirements (hardcoded), built once at import and shared read-only
+# by every repository instance
+_SPECIES_REQUIREMENTS: Mapping[ReptileSpecies, HabitatRequirements] = MappingProxyType({
+    ReptileSpecies.BEARDED_DRAGON: HabitatRequirements(
+        species=ReptileSpecies.BEARDED_DRAGON,
+        basking_temp_min=35.0,
+        basking_temp_max=40.0,
+        cool_side_temp_min=24.0,
+        cool_side_temp_max=29.0,
+        night_temp_min=20.0,
+        night_temp_max=24.0,
+        humidity_min=30.0,
+        humidity_max=40.0,
+        uvb_required=True,
+        substrate_type="tile or paper",
+        notes="Desert species, needs hot basking spot"
+    ),
+    ReptileSpecies.BALL_PYTHON: HabitatRequirements(
+        species=ReptileSpecies.BALL_PYTHON,
+        basking_temp_min=31.0,
+        basking_temp_max=33.0,
+        cool_side_temp_min=26.0,
+        cool_side_temp_max=28.0,
+        night_temp_min=24.0,
+        night_temp_max=26.0,
+        humidity_min=50.0,
+        humidity_max=60.0,
+        uvb_required=False,
+        substrate_type="cypress mulch",
+        notes="Tropical species, needs higher humidity"
+    ),
+    ReptileSpecies.CORN_SNAKE: HabitatRequirements(
+        species=ReptileSpecies.CORN_SNAKE,
+        basking_temp_min=28.0,
+        basking_temp_max=32.0,
+        cool_side_temp_min=21.0,
+        cool_side_temp_max=24.0,
+        night_temp_min=20.0,
+        night_temp_max=23.0,
+        humidity_min=40.0,
+        humidity_max=50.0,
+        uvb_required=False,
+        substrate_type="aspen shavings",
+        notes="Hardy species, moderate temps"
+    ),
+    ReptileSpecies.LEOPARD_GECKO: HabitatRequirements(
+        species=ReptileSpecies.LEOPARD_GECKO,
+        basking_temp_min=32.0,
+        basking_temp_max=35.0,
+        cool_side_temp_min=24.0,
+        cool_side_temp_max=27.0,
+        night_temp_min=21.0,
+        night_temp_max=24.0,
+        humidity_min=30.0,
+        humidity_max=40.0,
+        uvb_required=False,
+        substrate_type="tile or paper",
+        notes="Desert species, use heat mat for belly heat"
+    )
+})
 
 
 class InMemoryHabitatRepository(HabitatRepository):
@@ -134,68 +229,9 @@ class InMemoryHabitatRepository(HabitatRepository):
 
     def __init__(self):
         self._habitats: Dict[str, Habitat] = {}
+        self._requirements = _SPECIES_REQUIREMENTS
 
-        # Pre-load species requirements (hardcoded)
-        self._requirements = {
-            ReptileSpecies.BEARDED_DRAGON: HabitatRequirements(
-                species=ReptileSpecies.BEARDED_DRAGON,
-                basking_temp_min=35.0,
-                basking_temp_max=40.0,
-                cool_side_temp_min=24.0,
-                cool_side_temp_max=29.0,
-                night_temp_min=20.0,
-                night_temp_max=24.0,
-                humidity_min=30.0,
-                humidity_max=40.0,
-                uv_required=True,
-                substrate_type="tile or paper",
-                notes="Desert species, needs hot basking spot"
-            ),
-            ReptileSpecies.BALL_PYTHON: HabitatRequirements(
-                species=ReptileSpecies.BALL_PYTHON,
-                basking_temp_min=31.0,
-                basking_temp_max=33.0,
-                cool_side_temp_min=26.0,
-                cool_side_temp_max=28.0,
-                night_temp_min=24.0,
-                night_temp_max=26.0,
-                humidity_min=50.0,
-                humidity_max=60.0,
-                uv_required=False,
-                substrate_type="cypress mulch",
-                notes="Tropical species, needs higher humidity"
-            ),
-            ReptileSpecies.CORN_SNAKE: HabitatRequirements(
-                species=ReptileSpecies.CORN_SNAKE,
-                basking_temp_min=28.0,
-                basking_temp_max=32.0,
-                cool_side_temp_min=21.0,
-                cool_side_temp_max=24.0,
-                night_temp_min=20.0,
-                night_temp_max=23.0,
-                humidity_min=40.0,
-                humidity_max=50.0,
-                uv_required=False,
-                substrate_type="aspen shavings",
-                notes="Hardy species, moderate temps"
-            ),
-            ReptileSpecies.LEOPARD_GECKO: HabitatRequirements(
-                species=ReptileSpecies.LEOPARD_GECKO,
-                basking_temp_min=32.0,
-                basking_temp_max=35.0,
-                cool_side_temp_min=24.0,
-                cool_side_temp_max=27.0,
-                night_temp_min=21.0,
-                night_temp_max=24.0,
-                humidity_min=30.0,
-                humidity_max=40.0,
-                uv_required=False,
-                substrate_type="tile or paper",
-                notes="Desert species, use heat mat for belly heat"
-            )
-        }
-
-        print("📦 InMemoryHabitatRepository created with species data")
+        logger.debug("📦 InMemoryHabitatRepository created with species data")
 
     def get_requirements(self, species: ReptileSpecies) -> HabitatRequirements:
         """Load species requirements"""
@@ -210,7 +246,7 @@ class InMemoryHabitatRepository(HabitatRepository):
     def save_habitat(self, habitat: Habitat) -> bool:
         """Save habitat configuration"""
         self._habitats[habitat.habitat_id] = habitat
-        print(f"💾 Saved habitat: {habitat.name}")
+        logger.debug("💾 Saved habitat: %s", habitat.name)
         return True
 
     def list_habitats(self) -> List[Habitat]:
@@ -220,7 +256,7 @@ class InMemoryHabitatRepository(HabitatRepository):
     def clear(self):
         """Clear all habitats (keeps species requirements)"""
         self._habitats = {}
-        print("🗑️  Habitats cleared")
+        logger.debug("🗑️  Habitats cleared")
 
 
 class InMemoryThresholdRepository(ThresholdRepository):
@@ -228,7 +264,7 @@ class InMemoryThresholdRepository(ThresholdRepository):
 
     def __init__(self):
         self._thresholds: Dict[str, Threshold] = {}
-        print("📦 InMemoryThresholdRepository created")
+        logger.debug("📦 InMemoryThresholdRepository created")
 
     def get_threshold(self, sensor_id: str) -> Optional[Threshold]:
         """Get threshold for sensor"""
@@ -237,14 +273,14 @@ class InMemoryThresholdRepository(ThresholdRepository):
     def save_threshold(self, threshold: Threshold) -> bool:
         """Save threshold"""
         self._thresholds[threshold.sensor_id] = threshold
-        print(f"💾 Saved threshold for {threshold.sensor_id}: {threshold.min_value}-{threshold.max_value}")
+        logger.debug("💾 Saved threshold for %s: %s-%s", threshold.sensor_id, threshold.min_value, threshold.max_value)
         return True
 
     def get_thresholds_by_habitat(self, habitat_id: str) -> List[Threshold]:
-        """Get all thresholds for habitat (simplified)"""
-        return list(self._thresholds.values())
+        """Get all thresholds for habitat"""
+        return [t for t in self._thresholds.values() if t.habitat_id == habitat_id]
 
     def clear(self):
         """Clear all thresholds"""
         self._thresholds = {}
-        print("🗑️  Thresholds cleared")
\ No newline at end of file
+        logger.debug("🗑️  Thresholds cleared")
\ No newline at end of file
@@ -5,10 +5,13 @@ Mock sensor adapter for testing without real hardware.
 Returns random temperature and humidity values.
 """
 
+import logging
 import random
 from domain.ports import SensorHardwareInterface
 from domain.models import SensorMetadata, SensorType, SensorUnit
 
+logger = logging.getLogger(__name__)
+
 
 class MockTemperatureHumiditySensor(SensorHardwareInterface):
     """
@@ -84,12 +87,12 @@ class MockTemperatureHumiditySensor(SensorHardwareInterface):
     def break_sensor(self):
         """Simulate sensor failure (for testing error handling)"""
         self._is_healthy = False
-        print("💥 Mock sensor broken!")
+        logger.debug("💥 Mock sensor broken!")
 
     def fix_sensor(self):
         """Restore sensor (for testing recovery)"""
         self._is_healthy = True
-        print("🔧 Mock sensor fixed!")
+        logger.debug("🔧 Mock sensor fixed!")
 
     def set_temperature(self, temp: float):
         """Manually set temperature (for testing specific scenarios)"""
@@ -7,11 +7,15 @@ These adapters implement the repository ports defined in domain/ports.py,
 storing data in MongoDB collections.
 """
 
-from typing import List, Optional
+import atexit
+from time import monotonic
+from typing import Dict, Iterator, List, Optional
 from datetime import datetime
 
+from pymongo.collection import Collection
 from pymongo.database import Database
-from pymongo import ASCENDING, DESCENDING
+from pymongo import ASCENDING, DESCENDING, IndexModel, InsertOne, UpdateOne
+from pymongo.write_concern import WriteConcern
 
 from domain.ports import (
     SensorRepository,
@@ -36,6 +40,42 @@ from domain.models import (
     PowerStripConfig
 )
 
+# Fields _doc_to_reading reads; with the (sensor_id, timestamp) index this
+# keeps _id and any extra fields off the wire
+_READING_PROJECTION = {
+    "_id": 0,
+    "sensor_id": 1,
+    "value": 1,
+    "timestamp": 1,
+    "unit": 1,
+    "is_valid": 1,
+    "habitat_id": 1,
+}
+
+# _id is never read back from the other collections
+_NO_ID_PROJECTION = {"_id": 0}
+
+# Stored enum values -> members; a dict lookup is much cheaper than calling
+# the Enum class for every decoded document
+_SENSOR_UNITS = {unit.value: unit for unit in SensorUnit}
+_OUTLET_STATES = {state.value: state for state in OutletStateEnum}
+_CONTROL_MODES = {mode.value: mode for mode in ControlMode}
+_SPECIES = {species.value: species for species in ReptileSpecies}
+_SENSOR_LOCATIONS = {location.value: location for location in SensorLocation}
+
+
+def _create_missing_indexes(collection: Collection, indexes: List[IndexModel]):
+    """
+    Create whichever of indexes (matched by name) the collection lacks.
+
+    One list_indexes round trip replaces a create_index command per index
+    on every start; nothing else is sent once the indexes exist.
+    """
+    existing = {index["name"] for index in collection.list_indexes()}
+    missing = [index for index in indexes if index.document["name"] not in existing]
+    if missing:
+        collection.create_indexes(missing)
+
 
 class MongoDBSensorRepository(SensorRepository):
     """
@@ -45,48 +85,119 @@ class MongoDBSensorRepository(SensorRepository):
     Indexes:
         - (sensor_id, timestamp) for efficient queries
         - TTL index on timestamp for automatic cleanup
+
+    Readings are buffered and written with one insert_many per batch_size
+    readings, or once the oldest buffered reading is flush_interval seconds
+    old. Queries flush first, so they see every saved reading.
+    batch_size=1 writes each reading immediately with insert_one. A save
+    that only buffers its reading returns True once it is queued; errors
+    from the later batch write surface from whichever call flushes it.
+
+    Pass acknowledged_writes=False to insert readings unacknowledged (w=0),
+    taking the server round trip off the ingest path. Write errors then go
+    unreported and a lost batch loses up to batch_size readings, so the save
+    methods return False for those readings, buffered or not: they are
+    sent, but never confirmed.
     """
 
     COLLECTION_NAME = "sensor_readings"
     TTL_SECONDS = 90 * 24 * 60 * 60  # 90 days
+    DEFAULT_BATCH_SIZE = 50
+    DEFAULT_FLUSH_INTERVAL = 5.0  # seconds
+    LATEST_CACHE_SECONDS = 1.0  # reuse a sensor's latest reading within a tick
 
-    def __init__(self, database: Database):
+    def __init__(
+        self,
+        database: Database,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        flush_interval: float = DEFAULT_FLUSH_INTERVAL,
+        acknowledged_writes: bool = True
+    ):
         self._db = database
         self._collection = database[self.COLLECTION_NAME]
+        self._writes = self._collection if acknowledged_writes else (
+            self._collection.with_options(write_concern=WriteConcern(w=0))
+        )
+        self._batch_size = max(1, batch_size)
+        self._flush_interval = flush_interval
+        self._buffer: List[dict] = []
+        self._buffer_started = 0.0
+        # sensor_id -> (expires_at, latest reading); dropped when the sensor saves
+        self._latest: Dict[str, tuple[float, Optional[SensorReading]]] = {}
+        # Write out whatever is still buffered when the process exits
+        atexit.register(self._flush_at_exit)
         self._ensure_indexes()
 
     def _ensure_indexes(self):
         """Create necessary indexes if they don't exist."""
-        # Compound index for efficient sensor + time queries
-        self._collection.create_index(
-            [("sensor_id", ASCENDING), ("timestamp", DESCENDING)],
-            name="sensor_timestamp_idx"
-        )
-        # NEW: Compound index for habitat + time queries
-        self._collection.create_index(
-            [("habitat_id", ASCENDING), ("timestamp", DESCENDING)],
-            name="habitat_timestamp_idx"
-        )
-        # TTL index for automatic cleanup after 90 days
-        self._collection.create_index(
-            "timestamp",
-            expireAfterSeconds=self.TTL_SECONDS,
-            name="ttl_idx"
-        )
+        _create_missing_indexes(self._collection, [
+            # Compound index for efficient sensor + time queries
+            IndexModel(
+                [("sensor_id", ASCENDING), ("timestamp", DESCENDING)],
+                name="sensor_timestamp_idx"
+            ),
+            # NEW: Compound index for habitat + time queries
+            IndexModel(
+                [("habitat_id", ASCENDING), ("timestamp", DESCENDING)],
+                name="habitat_timestamp_idx"
+            ),
+            # TTL index for automatic cleanup after 90 days
+            IndexModel(
+                "timestamp",
+                expireAfterSeconds=self.TTL_SECONDS,
+                name="ttl_idx"
+            ),
+        ])
 
     def save_reading(self, reading: SensorReading) -> bool:
-        """Save a sensor reading to MongoDB."""
-        doc = {
-            "sensor_id": reading.sensor_id,
-            "value": reading.value,
-            "timestamp": reading.timestamp,
-            "unit": reading.unit.value,
-            "is_valid": reading.is_valid
-        }
-        # Include habitat_id if present
-        if reading.habitat_id:
-            doc["habitat_id"] = reading.habitat_id
-        result = self._collection.insert_one(doc)
+        """Save a sensor reading to MongoDB (buffered unless batch_size is 1)."""
+        self._latest.pop(reading.sensor_id, None)
+        doc = self._reading_to_doc(reading)
+        if self._batch_size == 1:
+            result = self._writes.insert_one(doc)
+            return result.acknowledged
+
+        if not self._buffer:
+            self._buffer_started = monotonic()
+        self._buffer.append(doc)
+        if (len(self._buffer) >= self._batch_size
+                or monotonic() - self._buffer_started >= self._flush_interval):
+            return self._write_buffer()
+        # Queued; under w=0 the eventual write will never be confirmed
+        return self._writes is self._collection
+
+    def save_readings(self, readings: List[SensorReading]) -> bool:
+        """Save several readings with a single insert_many."""
+        self.flush()
+        if not readings:
+            return True
+        for reading in readings:
+            self._latest.pop(reading.sensor_id, None)
+        result = self._writes.insert_many(
+            [self._reading_to_doc(reading) for reading in readings],
+            ordered=False
+        )
+        return result.acknowledged
+
+    def flush(self) -> None:
+        """Write out any buffered readings."""
+        self._write_buffer()
+
+    def _flush_at_exit(self):
+        """Flush on interpreter exit, reporting rather than raising on failure."""
+        pending = len(self._buffer)
+        try:
+            self.flush()
+        except Exception as e:
+            print(f"  Could not write {pending} buffered readings at exit: {e}")
+
+    def _write_buffer(self) -> bool:
+        """Insert the buffered readings in one batch."""
+        if not self._buffer:
+            return True
+        # Swap the buffer out first so a failed batch is not retried on every save
+        docs, self._buffer = self._buffer, []
+        result = self._writes.insert_many(docs, ordered=False)
         return result.acknowledged
 
     def get_readings(
@@ -96,20 +207,40 @@ class MongoDBSensorRepository(SensorRepository):
         end_time: datetime
     ) -> List[SensorReading]:
         """Get readings for a sensor within a time range."""
+        return list(self.iter_readings(sensor_id, start_time, end_time))
+
+    def iter_readings(
+        self,
+        sensor_id: str,
+        start_time: datetime,
+        end_time: datetime
+    ) -> Iterator[SensorReading]:
+        """Yield readings for a sensor within a time range, one cursor batch at a time."""
+        self.flush()
         cursor = self._collection.find({
             "sensor_id": sensor_id,
             "timestamp": {"$gte": start_time, "$lte": end_time}
-        }).sort("timestamp", ASCENDING)
+        }, _READING_PROJECTION).sort("timestamp", ASCENDING)
 
-        return [self._doc_to_reading(doc) for doc in cursor]
+        for doc in cursor:
+            yield self._doc_to_reading(doc)
 
     def get_latest_reading(self, sensor_id: str) -> Optional[SensorReading]:
         """Get the most recent reading for a sensor."""
+        cached = self._latest.get(sensor_id)
+        if cached is not None and cached[0] > monotonic():
+            return cached[1]
+
+        self.flush()
         doc = self._collection.find_one(
             {"sensor_id": sensor_id},
-            sort=[("timestamp", DESCENDING)]
+            _READING_PROJECTION,
+            sort=[("timestamp", DESCENDING)],
+            hint="sensor_timestamp_idx"
         )
-        return self._doc_to_reading(doc) if doc else None
+        reading = self._doc_to_reading(doc) if doc else None
+        self._latest[sensor_id] = (monotonic() + self.LATEST_CACHE_SECONDS, reading)
+        return reading
 
     def get_readings_by_habitat(
         self,
@@ -118,18 +249,45 @@ class MongoDBSensorRepository(SensorRepository):
         end_time: datetime
     ) -> List[SensorReading]:
         """Get all readings for a habitat within a time range."""
+        return list(self.iter_readings_by_habitat(habitat_id, start_time, end_time))
+
+    def iter_readings_by_habitat(
+        self,
+        habitat_id: str,
+        start_time: datetime,
+        end_time: datetime
+    ) -> Iterator[SensorReading]:
+        """Yield all readings for a habitat within a time range, one cursor batch at a time."""
+        self.flush()
         # Now uses habitat_id field directly stored on readings
         cursor = self._collection.find({
             "habitat_id": habitat_id,
             "timestamp": {"$gte": start_time, "$lte": end_time}
-        }).sort("timestamp", ASCENDING)
+        }, _READING_PROJECTION).sort("timestamp", ASCENDING)
 
-        return [self._doc_to_reading(doc) for doc in cursor]
+        for doc in cursor:
+            yield self._doc_to_reading(doc)
 
     def count(self) -> int:
         """Get total number of readings stored."""
+        self.flush()
         return self._collection.count_documents({})
 
+    @staticmethod
+    def _reading_to_doc(reading: SensorReading) -> dict:
+        """Convert SensorReading to MongoDB document."""
+        doc = {
+            "sensor_id": reading.sensor_id,
+            "value": reading.value,
+            "timestamp": reading.timestamp,
+            "unit": reading.unit.value,
+            "is_valid": reading.is_valid
+        }
+        # Include habitat_id if present
+        if reading.habitat_id:
+            doc["habitat_id"] = reading.habitat_id
+        return doc
+
     @staticmethod
     def _doc_to_reading(doc: dict) -> SensorReading:
         """Convert MongoDB document to SensorReading."""
@@ -137,7 +295,7 @@ class MongoDBSensorRepository(SensorRepository):
             sensor_id=doc["sensor_id"],
             value=doc["value"],
             timestamp=doc["timestamp"],
-            unit=SensorUnit(doc["unit"]),
+            unit=_SENSOR_UNITS[doc["unit"]],
             is_valid=doc.get("is_valid", True),
             habitat_id=doc.get("habitat_id")
         )
@@ -163,30 +321,29 @@ class MongoDBOutletRepository(OutletRepository):
 
     def _ensure_indexes(self):
         """Create necessary indexes."""
-        self._commands.create_index(
-            [("outlet_id", ASCENDING), ("timestamp", DESCENDING)],
-            name="outlet_timestamp_idx"
-        )
-        self._states.create_index(
-            "outlet_id",
-            unique=True,
-            name="outlet_id_idx"
-        )
+        _create_missing_indexes(self._commands, [
+            IndexModel(
+                [("outlet_id", ASCENDING), ("timestamp", DESCENDING)],
+                name="outlet_timestamp_idx"
+            ),
+        ])
+        _create_missing_indexes(self._states, [
+            IndexModel("outlet_id", unique=True, name="outlet_id_idx"),
+        ])
 
     def save_command(self, command: OutletCommand) -> bool:
         """Save an outlet command to the audit trail."""
-        doc = {
-            "command_id": command.command_id,
-            "outlet_id": command.outlet_id,
-            "desired_state": command.desired_state.value,
-            "reason": command.reason,
-            "triggered_by_sensor": command.triggered_by_sensor,
-            "triggered_by_user": command.triggered_by_user,
-            "timestamp": command.timestamp,
-            "executed": command.executed,
-            "execution_result": command.execution_result
-        }
-        result = self._commands.insert_one(doc)
+        result = self._commands.insert_one(self._command_to_doc(command))
+        return result.acknowledged
+
+    def save_commands(self, commands: List[OutletCommand]) -> bool:
+        """Save several outlet commands to the audit trail in one round trip."""
+        if not commands:
+            return True
+        result = self._commands.bulk_write(
+            [InsertOne(self._command_to_doc(command)) for command in commands],
+            ordered=False
+        )
         return result.acknowledged
 
     def get_command_history(
@@ -196,33 +353,79 @@ class MongoDBOutletRepository(OutletRepository):
         end_time: datetime
     ) -> List[OutletCommand]:
         """Get command history for an outlet."""
+        return list(self.iter_command_history(outlet_id, start_time, end_time))
+
+    def iter_command_history(
+        self,
+        outlet_id: str,
+        start_time: datetime,
+        end_time: datetime
+    ) -> Iterator[OutletCommand]:
+        """Yield command history for an outlet, one cursor batch at a time."""
         cursor = self._commands.find({
             "outlet_id": outlet_id,
             "timestamp": {"$gte": start_time, "$lte": end_time}
-        }).sort("timestamp", ASCENDING)
+        }, _NO_ID_PROJECTION).sort("timestamp", ASCENDING)
 
-        return [self._doc_to_command(doc) for doc in cursor]
+        for doc in cursor:
+            yield self._doc_to_command(doc)
 
     def get_current_state(self, outlet_id: str) -> Optional[OutletState]:
         """Get the current state of an outlet."""
-        doc = self._states.find_one({"outlet_id": outlet_id})
+        doc = self._states.find_one({"outlet_id": outlet_id}, _NO_ID_PROJECTION)
         return self._doc_to_state(doc) if doc else None
 
     def save_state(self, state: OutletState) -> bool:
         """Update the current state of an outlet."""
-        doc = {
+        result = self._states.update_one(
+            {"outlet_id": state.outlet_id},
+            {"$set": self._state_to_doc(state)},
+            upsert=True
+        )
+        return result.acknowledged
+
+    def save_states(self, states: List[OutletState]) -> bool:
+        """Update the current state of several outlets in one round trip."""
+        if not states:
+            return True
+        result = self._states.bulk_write(
+            [
+                UpdateOne(
+                    {"outlet_id": state.outlet_id},
+                    {"$set": self._state_to_doc(state)},
+                    upsert=True
+                )
+                for state in states
+            ],
+            ordered=False
+        )
+        return result.acknowledged
+
+    @staticmethod
+    def _command_to_doc(command: OutletCommand) -> dict:
+        """Convert OutletCommand to MongoDB document."""
+        return {
+            "command_id": command.command_id,
+            "outlet_id": command.outlet_id,
+            "desired_state": command.desired_state.value,
+            "reason": command.reason,
+            "triggered_by_sensor": command.triggered_by_sensor,
+            "triggered_by_user": command.triggered_by_user,
+            "timestamp": command.timestamp,
+            "executed": command.executed,
+            "execution_result": command.execution_result
+        }
+
+    @staticmethod
+    def _state_to_doc(state: OutletState) -> dict:
+        """Convert OutletState to MongoDB document."""
+        return {
             "outlet_id": state.outlet_id,
             "state": state.state.value,
             "last_changed": state.last_changed,
             "mode": state.mode.value,
             "power_watts": state.power_watts
         }
-        result = self._states.update_one(
-            {"outlet_id": state.outlet_id},
-            {"$set": doc},
-            upsert=True
-        )
-        return result.acknowledged
 
     @staticmethod
     def _doc_to_command(doc: dict) -> OutletCommand:
@@ -230,7 +433,7 @@ class MongoDBOutletRepository(OutletRepository):
         return OutletCommand(
             command_id=doc["command_id"],
             outlet_id=doc["outlet_id"],
-            desired_state=OutletStateEnum(doc["desired_state"]),
+            desired_state=_OUTLET_STATES[doc["desired_state"]],
             reason=doc["reason"],
             triggered_by_sensor=doc.get("triggered_by_sensor"),
             triggered_by_user=doc.get("triggered_by_user"),
@@ -244,9 +447,9 @@ class MongoDBOutletRepository(OutletRepository):
         """Convert MongoDB document to OutletState."""
         return OutletState(
             outlet_id=doc["outlet_id"],
-            state=OutletStateEnum(doc["state"]),
+            state=_OUTLET_STATES[doc["state"]],
             last_changed=doc["last_changed"],
-            mode=ControlMode(doc.get("mode", "automatic")),
+            mode=_CONTROL_MODES[doc.get("mode", "automatic")],
             power_watts=doc.get("power_watts")
         )
 
@@ -267,13 +470,19 @@ class MongoDBHabitatRepository(HabitatRepository):
         self._db = database
         self._habitats = database[self.HABITATS_COLLECTION]
         self._requirements = database[self.REQUIREMENTS_COLLECTION]
+        # Species requirements are seeded once and never written by the service
+        self._requirements_cache: Dict[ReptileSpecies, HabitatRequirements] = {}
         self._ensure_indexes()
         self._seed_requirements()
 
     def _ensure_indexes(self):
         """Create necessary indexes."""
-        self._habitats.create_index("habitat_id", unique=True, name="habitat_id_idx")
-        self._requirements.create_index("species", unique=True, name="species_idx")
+        _create_missing_indexes(self._habitats, [
+            IndexModel("habitat_id", unique=True, name="habitat_id_idx"),
+        ])
+        _create_missing_indexes(self._requirements, [
+            IndexModel("species", unique=True, name="species_idx"),
+        ])
 
     def _seed_requirements(self):
         """Pre-seed species requirements if they don't exist."""
@@ -343,15 +552,19 @@ class MongoDBHabitatRepository(HabitatRepository):
         print(f"  Seeded {len(requirements_data)} species requirements")
 
     def get_requirements(self, species: ReptileSpecies) -> HabitatRequirements:
-        """Load species requirements from MongoDB."""
-        doc = self._requirements.find_one({"species": species.value})
-        if not doc:
+        """Load species requirements from MongoDB (cached after the first load)."""
+        if species not in self._requirements_cache:
+            # There are only a few species, so load them all in one query
+            for doc in self._requirements.find({}, _NO_ID_PROJECTION):
+                requirements = self._doc_to_requirements(doc)
+                self._requirements_cache[requirements.species] = requirements
+        if species not in self._requirements_cache:
             raise ValueError(f"No requirements found for {species.value}")
-        return self._doc_to_requirements(doc)
+        return self._requirements_cache[species]
 
     def get_habitat(self, habitat_id: str) -> Optional[Habitat]:
         """Load a habitat configuration."""
-        doc = self._habitats.find_one({"habitat_id": habitat_id})
+        doc = self._habitats.find_one({"habitat_id": habitat_id}, _NO_ID_PROJECTION)
         if not doc:
             return None
         return self._doc_to_habitat(doc)
@@ -369,13 +582,13 @@ class MongoDBHabitatRepository(HabitatRepository):
 
     def list_habitats(self) -> List[Habitat]:
         """Get all habitat configurations."""
-        cursor = self._habitats.find({})
+        cursor = self._habitats.find({}, _NO_ID_PROJECTION)
         return [self._doc_to_habitat(doc) for doc in cursor]
 
     def _doc_to_requirements(self, doc: dict) -> HabitatRequirements:
         """Convert MongoDB document to HabitatRequirements."""
         return HabitatRequirements(
-            species=ReptileSpecies(doc["species"]),
+            species=_SPECIES[doc["species"]],
             basking_temp_min=doc["basking_temp_min"],
             basking_temp_max=doc["basking_temp_max"],
             cool_side_temp_min=doc["cool_side_temp_min"],
@@ -392,7 +605,7 @@ class MongoDBHabitatRepository(HabitatRepository):
     def _doc_to_habitat(self, doc: dict) -> Habitat:
         """Convert MongoDB document to Habitat."""
         # Load the requirements for this species
-        requirements = self.get_requirements(ReptileSpecies(doc["species"]))
+        requirements = self.get_requirements(_SPECIES[doc["species"]])
 
         # Parse embedded sensors config
         sensors = []
@@ -400,7 +613,7 @@ class MongoDBHabitatRepository(HabitatRepository):
             sensors.append(SensorConfig(
                 sensor_id=sensor_doc["sensor_id"],
                 ble_address=sensor_doc["ble_address"],
-                location=SensorLocation(sensor_doc["location"]),
+                location=_SENSOR_LOCATIONS[sensor_doc["location"]],
                 device_type=sensor_doc.get("device_type", "LYWSD03MMC")
             ))
 
@@ -425,7 +638,7 @@ class MongoDBHabitatRepository(HabitatRepository):
         return Habitat(
             habitat_id=doc["habitat_id"],
             name=doc["name"],
-            species=ReptileSpecies(doc["species"]),
+            species=_SPECIES[doc["species"]],
             requirements=requirements,
             sensors=sensors,
             power_strip=power_strip,
@@ -502,7 +715,10 @@ class MongoDBThresholdRepository(ThresholdRepository):
 
     def _ensure_indexes(self):
         """Create necessary indexes."""
-        self._collection.create_index("sensor_id", unique=True, name="sensor_id_idx")
+        _create_missing_indexes(self._collection, [
+            IndexModel("sensor_id", unique=True, name="sensor_id_idx"),
+            IndexModel("habitat_id", name="habitat_id_idx"),
+        ])
 
     def get_threshold(self, sensor_id: str) -> Optional[Threshold]:
         """Get threshold for a sensor."""
@@ -520,6 +736,9 @@ class MongoDBThresholdRepository(ThresholdRepository):
             "warning_max": threshold.warning_max,
             "hysteresis": threshold.hysteresis
         }
+        # Keep an existing habitat tag when this save doesn't know the habitat
+        if threshold.habitat_id is not None:
+            doc["habitat_id"] = threshold.habitat_id
         result = self._collection.update_one(
             {"sensor_id": threshold.sensor_id},
             {"$set": doc},
@@ -529,8 +748,8 @@ class MongoDBThresholdRepository(ThresholdRepository):
         return result.acknowledged
 
     def get_thresholds_by_habitat(self, habitat_id: str) -> List[Threshold]:
-        """Get all thresholds (simplified - returns all)."""
-        cursor = self._collection.find({})
+        """Get all thresholds for a habitat."""
+        cursor = self._collection.find({"habitat_id": habitat_id})
         return [self._doc_to_threshold(doc) for doc in cursor]
 
     @staticmethod
@@ -543,5 +762,6 @@ class MongoDBThresholdRepository(ThresholdRepository):
             max_value=doc["max_value"],
             warning_min=doc.get("warning_min"),
             warning_max=doc.get("warning_max"),
-            hysteresis=doc.get("hysteresis", 2.0)
+            hysteresis=doc.get("hysteresis", 2.0),
+            habitat_id=doc.get("habitat_id")
         )
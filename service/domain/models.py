@@ -115,7 +115,7 @@ class SensorMetadata:  # Added: needed by ports
     accuracy: Optional[float] = None
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class HabitatRequirements:
     """
     Ideal conditions for a reptile species.
@@ -209,12 +209,16 @@ class Threshold:
     # Add hysteresis to prevent rapid toggling of outlets
     hysteresis: float = 2.0  # Default hysteresis value to prevent rapid toggling
 
+    # Habitat the sensor belongs to, so a habitat's thresholds are one lookup
+    habitat_id: Optional[str] = None
+
     @classmethod
     def from_habitat_requirements(
             cls,
             sensor_id: str,
             zone_type: str,
-            requirements: HabitatRequirements
+            requirements: HabitatRequirements,
+            habitat_id: Optional[str] = None
     ) -> 'Threshold':
         """
         Create thresholds from species requirements.
@@ -224,6 +228,7 @@ class Threshold:
             return cls(
                 sensor_id=sensor_id,
                 zone_type=zone_type,
+                habitat_id=habitat_id,
                 min_value=requirements.basking_temp_min,
                 max_value=requirements.basking_temp_max,
                 warning_min=requirements.basking_temp_min - 2,
@@ -234,6 +239,7 @@ class Threshold:
             return cls(
                 sensor_id=sensor_id,
                 zone_type=zone_type,
+                habitat_id=habitat_id,
                 min_value=requirements.cool_side_temp_min,
                 max_value=requirements.cool_side_temp_max,
                 warning_min=requirements.cool_side_temp_min - 2,
@@ -244,6 +250,7 @@ class Threshold:
             return cls(
                 sensor_id=sensor_id,
                 zone_type=zone_type,
+                habitat_id=habitat_id,
                 min_value=requirements.night_temp_min,
                 max_value=requirements.night_temp_max,
                 warning_min=requirements.night_temp_min - 2,
@@ -254,6 +261,7 @@ class Threshold:
             return cls(
                 sensor_id=sensor_id,
                 zone_type=zone_type,
+                habitat_id=habitat_id,
                 min_value=requirements.humidity_min,
                 max_value=requirements.humidity_max,
                 warning_min=requirements.humidity_min - 5,
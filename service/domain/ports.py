@@ -130,6 +130,14 @@ class SensorRepository(ABC):
         """
         pass
 
+    def flush(self) -> None:
+        """
+        Write out any readings the adapter is still holding.
+
+        Adapters that write each reading immediately need not override this.
+        """
+        pass
+
 
 # ═══════════════════════════════════════════════════════════════════
 # OUTLET/POWER CONTROL PORTS
@@ -215,6 +223,21 @@ class OutletRepository(ABC):
         """
         pass
 
+    def save_commands(self, commands: List[OutletCommand]) -> bool:
+        """
+        Save several outlet commands for audit trail.
+
+        Adapters that can write them in one call should override this.
+
+        Args:
+            commands: OutletCommands to save
+
+        Returns:
+            True if all were saved, False otherwise
+        """
+        results = [self.save_command(command) for command in commands]
+        return all(results)
+
     @abstractmethod
     def get_command_history(
             self,
@@ -519,6 +519,13 @@ class OutletAutomationService:
                 if command:
                     commands_executed.append(command)
 
+        # Save this reading's commands to history in one call
+        if commands_executed:
+            try:
+                self._outlet_repo.save_commands(commands_executed)
+            except Exception as e:
+                self._log_error("Failed to save automation commands", exception=e)
+
         return commands_executed
 
     def manual_control(
@@ -650,7 +657,8 @@ class OutletAutomationService:
         """
         Execute an automation rule.
 
-        Returns OutletCommand if executed, None if skipped.
+        Returns OutletCommand if executed, None if skipped. The caller saves
+        the command to history.
         """
         # Business logic: Check if outlet is already in desired state
         try:
@@ -680,12 +688,6 @@ class OutletAutomationService:
         command.executed = success
         command.execution_result = "success" if success else "failed"
 
-        # Save to history
-        try:
-            self._outlet_repo.save_command(command)
-        except Exception as e:
-            self._log_error("Failed to save automation command", exception=e)
-
         # Update rule state
         if success:
             rule.last_triggered = self._get_current_time()
@@ -864,7 +866,8 @@ class HabitatManagementService:
             basking_threshold = Threshold.from_habitat_requirements(
                 sensor_id=habitat.basking_temp_sensor_id,
                 zone_type="basking",
-                requirements=requirements
+                requirements=requirements,
+                habitat_id=habitat_id
             )
 
             # Save threshold
@@ -882,7 +885,8 @@ class HabitatManagementService:
             cool_threshold = Threshold.from_habitat_requirements(
                 sensor_id=habitat.cool_temp_sensor_id,
                 zone_type="cool_side",
-                requirements=requirements
+                requirements=requirements,
+                habitat_id=habitat_id
             )
 
             self._threshold_repo.save_threshold(cool_threshold)
@@ -898,7 +902,8 @@ class HabitatManagementService:
             humidity_threshold = Threshold.from_habitat_requirements(
                 sensor_id=habitat.humidity_sensor_id,
                 zone_type="humidity",
-                requirements=requirements
+                requirements=requirements,
+                habitat_id=habitat_id
             )
 
             self._threshold_repo.save_threshold(humidity_threshold)
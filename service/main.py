@@ -10,6 +10,7 @@ Once this works, we'll replace mocks with real adapters one at a time.
 import builtins
 import json
 import os
+import signal
 import sys
 import time
 from datetime import datetime, timezone
@@ -184,7 +185,7 @@ def create_test_app():
 
     print("📦 Connecting to MongoDB...")
 
-    mongo_conn = MongoDBConnection(
+    mongo_conn = MongoDBConnection.get_or_create(
         uri=os.getenv("MONGODB_URI", "mongodb://localhost:27017"),
         database=os.getenv("MONGODB_DATABASE", "reptilia")
     )
@@ -749,6 +750,7 @@ def run_interactive_mode():
             print("✓ Sensor set to 37°C (ideal basking temp)")
 
         elif cmd == 'q':
+            app['sensor_repo'].flush()
             print("👋 Goodbye!")
             break
 
@@ -760,6 +762,10 @@ def main():
     """Main entry point"""
     import sys
 
+    # Exit normally on SIGTERM (e.g. docker stop) so atexit handlers run and
+    # buffered sensor readings get written
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+
     if len(sys.argv) > 1 and sys.argv[1] == '--interactive':
         run_interactive_mode()
     else: